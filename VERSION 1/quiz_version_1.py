@@ -3,13 +3,34 @@
 # Import necessary modules
 import sys
 import csv
-import matplotlib.pyplot as plt
+import sqlite3
+import threading
 from pathlib import Path
 import os
 
 # Get the directory where the script is located
 script_dir = Path(__file__).parent
 results_file = script_dir / 'quiz_results.csv'
+stats_file = script_dir / 'quiz_results_totals.db'
+
+# Number of most recent results shown in the graph
+RECENT_RESULTS = 20
+
+# Running totals kept next to the results file, so the graph doesn't have to
+# re-read every saved result
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    source_size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0.0, -1);
+CREATE TABLE IF NOT EXISTS best (name TEXT PRIMARY KEY, best REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS recent (id INTEGER PRIMARY KEY, name TEXT NOT NULL, percentage REAL NOT NULL);
+"""
+# Stored in the file, so a totals file with other tables is built again instead of used
+STATS_VERSION = 1
 
 # Define the score
 score = 0
@@ -29,6 +50,38 @@ questions_answers = {
     "What is the capital city of Japan?": "Tokyo",
 }
 
+def add_to_stats(stats, name, percentage):
+    stats.execute("UPDATE totals SET count = count + 1, total = total + ?", (percentage,))
+    stats.execute("INSERT INTO best VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET best = MAX(best, excluded.best)",
+                  (name, percentage))
+    stats.execute("INSERT INTO recent (name, percentage) VALUES (?, ?)", (name, percentage))
+    stats.execute("DELETE FROM recent WHERE id <= (SELECT MAX(id) FROM recent) - ?", (RECENT_RESULTS,))
+
+def open_stats():
+    stats = sqlite3.connect(str(stats_file))
+    if stats.execute("PRAGMA user_version").fetchone()[0] != STATS_VERSION:
+        stats.executescript("DROP TABLE IF EXISTS totals; DROP TABLE IF EXISTS best; DROP TABLE IF EXISTS recent;")
+        stats.execute(f"PRAGMA user_version = {STATS_VERSION}")
+    stats.executescript(STATS_SCHEMA)
+    # Rebuild the totals if the results file was changed some other way (only needed once)
+    if stats.execute("SELECT source_size FROM totals").fetchone()[0] != results_file.stat().st_size:
+        with stats:
+            stats.execute("UPDATE totals SET count = 0, total = 0.0")
+            stats.execute("DELETE FROM best")
+            stats.execute("DELETE FROM recent")
+            with open(results_file, 'r') as f:
+                for row in csv.DictReader(f):
+                    add_to_stats(stats, row['Name'], float(row['Percentage']))
+            stats.execute("UPDATE totals SET source_size = ?", (results_file.stat().st_size,))
+    return stats
+
+# Load matplotlib in the background while the participant types, since the
+# graph is only needed at the end
+def preload_matplotlib():
+    import matplotlib.figure
+
+threading.Thread(target=preload_matplotlib, daemon=True).start()
+
 # Function to display the quiz
 def display_quiz():
     print("\nWelcome to the Quiz Game!")
@@ -57,24 +110,24 @@ def display_quiz():
     print("You will be asked 5 questions.\n")
     return name
 
-def plot_results_comparison(current_name, current_score):
-    # Read all results
-    names = []
-    scores = []
-    with open(results_file, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            names.append(row['Name'])
-            scores.append(float(row['Percentage']))
+def plot_results_comparison(stats, current_name, current_score):
+    import matplotlib.pyplot as plt
+
+    # Only the running totals and the most recent results are read
+    count, total = stats.execute("SELECT count, total FROM totals").fetchone()
+    recent = stats.execute("SELECT name, percentage FROM recent ORDER BY id").fetchall()
+    names = [name for name, score in recent]
+    scores = [score for name, score in recent]
     
     # Create bar chart
     plt.figure(figsize=(10, 6))
-    plt.bar(names, scores)
+    plt.bar(range(len(names)), scores)
     plt.axhline(y=current_score, color='r', linestyle='--', label='Your Score')
+    plt.axhline(y=total / count, color='gray', linestyle=':', label='Average Score')
     plt.xlabel('Participants')
     plt.ylabel('Score (%)')
-    plt.title('Quiz Results Comparison')
-    plt.xticks(rotation=45)
+    plt.title(f'Quiz Results Comparison (last {len(names)} of {count} results)')
+    plt.xticks(range(len(names)), names, rotation=45)
     plt.legend()
     plt.tight_layout()
     plt.show()
@@ -101,10 +154,17 @@ print("-" * 50)
 percentage = (score / 5) * 100
 print(f"\nQuiz complete! Your score is {score} out of 5 ({percentage:.1f}%).\n")
 
-# Save results to file
+# Save results to file, and add them to the running totals
+stats = open_stats()
 with open(results_file, 'a', newline='') as f:
     writer = csv.writer(f)
     writer.writerow([name, score, percentage])
+with stats:
+    add_to_stats(stats, name, percentage)
+    stats.execute("UPDATE totals SET source_size = ?", (results_file.stat().st_size,))
+
+best = stats.execute("SELECT best FROM best WHERE name = ?", (name,)).fetchone()[0]
+print(f"Your best score so far is {best:.1f}%.\n")
 
 # Show comparison graph
-plot_results_comparison(name, percentage)
\ No newline at end of file
+plot_results_comparison(stats, name, percentage)
\ No newline at end of file
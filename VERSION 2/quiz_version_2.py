@@ -4,15 +4,40 @@
 import time
 import sys
 import csv
+import sqlite3
 from datetime import datetime
 import random
-import matplotlib.pyplot as plt
+import threading
 from pathlib import Path
 import easygui as gui
 
 # Define script directory and results file
 script_dir = Path(__file__).parent
 results_file = script_dir / 'quiz_results_2.csv'
+stats_file = script_dir / 'quiz_results_2_totals.db'
+
+# Number of most recent results shown in the graph
+RECENT_RESULTS = 20
+
+# Running totals kept next to the results file, so the graph doesn't have to
+# re-read every saved result
+STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    source_size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0.0, -1);
+CREATE TABLE IF NOT EXISTS best (name TEXT PRIMARY KEY, best REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS recent (id INTEGER PRIMARY KEY, name TEXT NOT NULL, percentage REAL NOT NULL, date TEXT);
+"""
+# Stored in the file, so a totals file with other tables is built again instead of used
+STATS_VERSION = 1
+
+def preload_matplotlib():
+    # Load matplotlib in the background, since the graph is only needed at the end
+    import matplotlib.figure
 
 class QuizGame:
     def __init__(self):
@@ -32,6 +57,7 @@ class QuizGame:
         }
         self.num_questions = 5
         self.initialize_results_file()
+        self.stats = self.open_stats()
 
     def initialize_results_file(self):
         # Initialize the results CSV file if it doesn't exist
@@ -40,6 +66,31 @@ class QuizGame:
                 writer = csv.writer(f)
                 writer.writerow(['Name', 'Score', 'Percentage', 'Date'])
 
+    def open_stats(self):
+        stats = sqlite3.connect(str(stats_file))
+        if stats.execute("PRAGMA user_version").fetchone()[0] != STATS_VERSION:
+            stats.executescript("DROP TABLE IF EXISTS totals; DROP TABLE IF EXISTS best; DROP TABLE IF EXISTS recent;")
+            stats.execute(f"PRAGMA user_version = {STATS_VERSION}")
+        stats.executescript(STATS_SCHEMA)
+        # Rebuild the totals if the results file was changed some other way (only needed once)
+        if stats.execute("SELECT source_size FROM totals").fetchone()[0] != results_file.stat().st_size:
+            with stats:
+                stats.execute("UPDATE totals SET count = 0, total = 0.0")
+                stats.execute("DELETE FROM best")
+                stats.execute("DELETE FROM recent")
+                with open(results_file, 'r') as f:
+                    for row in csv.DictReader(f):
+                        self.add_to_stats(stats, row['Name'], float(row['Percentage']), row.get('Date', ''))
+                stats.execute("UPDATE totals SET source_size = ?", (results_file.stat().st_size,))
+        return stats
+
+    def add_to_stats(self, stats, name, percentage, date):
+        stats.execute("UPDATE totals SET count = count + 1, total = total + ?", (percentage,))
+        stats.execute("INSERT INTO best VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET best = MAX(best, excluded.best)",
+                      (name, percentage))
+        stats.execute("INSERT INTO recent (name, percentage, date) VALUES (?, ?, ?)", (name, percentage, date))
+        stats.execute("DELETE FROM recent WHERE id <= (SELECT MAX(id) FROM recent) - ?", (RECENT_RESULTS,))
+
     def validate_name(self):
         # Get and validate user's name using easygui
         while True:
@@ -137,29 +188,32 @@ class QuizGame:
         with open(results_file, 'a', newline='') as f:
             writer = csv.writer(f)
             writer.writerow([self.name, self.score, self.percentage, current_date])
+        with self.stats:
+            self.add_to_stats(self.stats, self.name, self.percentage, current_date)
+            self.stats.execute("UPDATE totals SET source_size = ?", (results_file.stat().st_size,))
 
     def plot_results_comparison(self):
         """Create and display results comparison graph"""
-        names, scores, dates = [], [], []
-        with open(results_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                names.append(row['Name'])
-                scores.append(float(row['Percentage']))
-                dates.append(row['Date'] if 'Date' in row else '')
+        import matplotlib.pyplot as plt
+
+        # Only the running totals and the most recent results are read
+        count, total = self.stats.execute("SELECT count, total FROM totals").fetchone()
+        recent = self.stats.execute("SELECT name, percentage FROM recent ORDER BY id").fetchall()
+        best = self.stats.execute("SELECT best FROM best WHERE name = ?", (self.name,)).fetchone()[0]
+        names = [name for name, score in recent]
+        scores = [score for name, score in recent]
 
         plt.figure(figsize=(12, 6))
         bars = plt.bar(range(len(names)), scores)
         
-        for i, (name, score) in enumerate(zip(names, scores)):
-            if name == self.name and score == self.percentage:
-                bars[i].set_color('green')
+        # The participant's result was saved last, so it is the last bar
+        bars[-1].set_color('green')
             
         plt.xlabel('Participants')
         plt.ylabel('Score (%)')
-        plt.title('Quiz Results Comparison')
+        plt.title(f'Quiz Results Comparison (last {len(names)} of {count} results)')
         plt.xticks(range(len(names)), names, rotation=45)
-        plt.axhline(y=sum(scores)/len(scores), color='r', linestyle='--', label='Average Score')
+        plt.axhline(y=total / count, color='r', linestyle='--', label='Average Score')
         plt.legend()
         plt.tight_layout()
         
@@ -169,7 +223,7 @@ class QuizGame:
         plt.close()
         
         gui.msgbox(
-            msg="Here are the quiz results comparison:",
+            msg=f"Here are the quiz results comparison:\nYour best score so far is {best:.1f}%.",
             title="Results Comparison",
             image=str(temp_plot)
         )
@@ -178,6 +232,7 @@ class QuizGame:
         temp_plot.unlink()
 
 def main():
+    threading.Thread(target=preload_matplotlib, daemon=True).start()
     quiz = QuizGame()
     quiz.display_welcome()
     quiz.run_quiz()
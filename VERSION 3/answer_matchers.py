@@ -0,0 +1,99 @@
+# Answer matchers for the quiz program
+# Each matcher takes a normalized answer and the normalized correct answer (see
+# normalize_answer in quiz_version_3.py) and says whether the answer counts as
+# correct. QuizGame picks a matcher for each question type (GRADERS), so
+# multiple choice stays exact while typed answers can allow small differences.
+
+# Import necessary modules
+import math
+import re
+
+# Numbers written with thousands separators, e.g. "1,000" or "-12,345.5"
+THOUSANDS = re.compile(r'-?\d{1,3}(,\d{3})+(\.\d+)?')
+
+def exact_match(user_answer, correct_answer):
+    return user_answer == correct_answer
+
+def parse_number(text):
+    """Read a typed number, allowing thousands separators ("1,000"). Returns None if it isn't one."""
+    if THOUSANDS.fullmatch(text):
+        text = text.replace(',', '')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+class NumericMatcher:
+    """Numbers match if they are within a tolerance of each other, so rounding doesn't count as wrong."""
+
+    def __init__(self, rel_tol=1e-9, abs_tol=0.0):
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+
+    def __call__(self, user_answer, correct_answer):
+        if user_answer == correct_answer:
+            return True
+        user_number = parse_number(user_answer)
+        correct_number = parse_number(correct_answer)
+        if user_number is None or correct_number is None:
+            return False
+        return math.isclose(user_number, correct_number, rel_tol=self.rel_tol, abs_tol=self.abs_tol)
+
+def bounded_edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 if it is more than limit.
+
+    Only the cells within limit of the diagonal are worked out and kept, and it
+    stops as soon as a whole row is over the limit, so this is O(len(a) * limit)
+    time and O(limit) memory.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    too_far = limit + 1
+
+    # Only the band of cells within limit of the diagonal is kept: row[d] is the
+    # distance between a[:i] and b[:j] for j = i + d - limit
+    width = 2 * limit + 1
+    previous = [too_far] * width
+    for j in range(min(limit, len(b)) + 1):
+        previous[j + limit] = j
+    for i in range(1, len(a) + 1):
+        current = [too_far] * width
+        for d in range(width):
+            j = i + d - limit
+            if j < 0 or j > len(b):
+                continue
+            if j == 0:
+                current[d] = i
+                continue
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            distance = previous[d] + cost
+            if d + 1 < width:
+                distance = min(distance, previous[d + 1] + 1)
+            if d > 0:
+                distance = min(distance, current[d - 1] + 1)
+            current[d] = min(distance, too_far)
+        if min(current) > limit:
+            return too_far
+        previous = current
+    return previous[len(b) - len(a) + limit]
+
+class FuzzyMatcher:
+    """Typed answers match if they are only a few typos away from the correct answer.
+
+    One typo is allowed for every `length_per_typo` characters of the correct
+    answer, up to max_typos, so short answers (like "au") still have to be exact.
+    """
+
+    def __init__(self, max_typos=2, length_per_typo=5):
+        self.max_typos = max_typos
+        self.length_per_typo = length_per_typo
+
+    def __call__(self, user_answer, correct_answer):
+        if user_answer == correct_answer:
+            return True
+        limit = min(self.max_typos, len(correct_answer) // self.length_per_typo)
+        if limit == 0:
+            return False
+        return bounded_edit_distance(user_answer, correct_answer, limit) <= limit
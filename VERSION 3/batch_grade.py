@@ -0,0 +1,103 @@
+# Batch grading for the quiz program
+# Grades a whole file of answer sheets without any dialogs and saves the results
+# in the same format as save_results.
+#
+# Usage: python batch_grade.py submissions.jsonl [--workers 4] [--no-save]
+# Each submission has a participant, question and answer, either as a JSON object
+# per line (.jsonl) or as CSV columns with those names.
+
+# Import necessary modules
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from quiz_version_3 import QuizGame
+
+# Number of participants sent to a worker process at a time
+CHUNK_SIZE = 500
+
+def read_submissions(path):
+    """Yield (participant, question, answer) tuples from a .jsonl or .csv file."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['participant'], record['question'], record['answer']
+        else:
+            for row in csv.DictReader(f):
+                yield row['participant'], row['question'], row['answer']
+
+def grade_sheets(sheets):
+    """Grade a list of (participant, [(question, answer), ...]) answer sheets."""
+    quiz = QuizGame()
+    current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    unknown = 0
+    for participant, answers in sheets:
+        score = 0
+        attempted = 0
+        for question, answer in answers:
+            result = quiz.grade_answer(question, answer)
+            if result is None:
+                unknown += 1
+                continue
+            attempted += 1
+            if result:
+                score += 1
+        if attempted:
+            rows.append([participant, score, (score / attempted) * 100, attempted, current_date])
+    return rows, unknown
+
+def grade_file(path, workers=1):
+    """Grade every answer sheet in a submissions file and return the result rows."""
+    sheets = defaultdict(list)
+    for participant, question, answer in read_submissions(path):
+        sheets[participant].append((question, answer))
+    sheets = list(sheets.items())
+
+    if workers <= 1:
+        return grade_sheets(sheets)
+
+    # Split the participants into chunks and grade them across several processes
+    chunks = [sheets[i:i + CHUNK_SIZE] for i in range(0, len(sheets), CHUNK_SIZE)]
+    rows = []
+    unknown = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_rows, chunk_unknown in pool.map(grade_sheets, chunks):
+            rows.extend(chunk_rows)
+            unknown += chunk_unknown
+    return rows, unknown
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade quiz answer sheets in bulk.")
+    parser.add_argument('submissions', type=Path, help="JSONL or CSV file of submissions")
+    parser.add_argument('--workers', type=int, default=1, help="number of worker processes")
+    parser.add_argument('--no-save', action='store_true', help="print results instead of saving them")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows, unknown = grade_file(args.submissions, args.workers)
+    elapsed = time.perf_counter() - start
+
+    if args.no_save:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['Name', 'Score', 'Percentage', 'Questions_Attempted', 'Date'])
+        writer.writerows(rows)
+    else:
+        quiz = QuizGame()
+        quiz.initialize_results_file()
+        quiz.save_result_rows(rows)
+
+    if unknown:
+        print(f"Skipped {unknown} answers to questions that are not in the question bank.", file=sys.stderr)
+    print(f"Graded {len(rows)} participants in {elapsed:.2f} seconds.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# Benchmark for the quiz program
+# Runs each stage of a quiz with a fake UI (no dialogs) against generated
+# question banks and results files of different sizes, and reports throughput
+# and latency percentiles for each stage. With --memory it instead compares the
+# memory used by each active quiz session before and after the compact records.
+#
+# Usage: python benchmark_quiz.py [--sizes 1000 10000 100000] [--repeat 200] [--memory]
+
+# Import necessary modules
+import argparse
+import csv
+import json
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import quiz_version_3
+from question_bank import build_index
+from quiz_server import QuizSession
+from quiz_version_3 import QuizGame, CsvResults, RESULTS_HEADER, normalize_answer
+
+class FakeUI:
+    """Stands in for easygui and answers every dialog straight away.
+
+    Questions are answered correctly with the given accuracy, using the
+    quiz's answer key (set quiz after creating the QuizGame).
+    """
+
+    def __init__(self, num_questions=10, accuracy=0.7, rng=None):
+        self.num_questions = num_questions
+        self.accuracy = accuracy
+        self.rng = rng if rng is not None else random.Random(0)
+        self.quiz = None
+
+    def _knows(self, question):
+        return question in self.quiz.answer_key and self.rng.random() < self.accuracy
+
+    def msgbox(self, msg="", title="", **kwargs):
+        return "OK"
+
+    def textbox(self, msg="", title="", text="", **kwargs):
+        return text
+
+    def ynbox(self, msg="", title="", **kwargs):
+        return False
+
+    def integerbox(self, msg="", title="", lowerbound=0, upperbound=99, **kwargs):
+        if title == "Age Verification":
+            return 15
+        return min(self.num_questions, upperbound)
+
+    def enterbox(self, msg="", title="", **kwargs):
+        if title == "Quiz Registration":
+            return "Benchmark"
+        return self.quiz.answer_key[msg][0] if self._knows(msg) else "0"
+
+    def buttonbox(self, msg="", title="", choices=(), **kwargs):
+        if self._knows(msg):
+            correct_answer = self.quiz.answer_key[msg][0]
+            for choice in choices:
+                if normalize_answer(choice) == correct_answer:
+                    return choice
+        return self.rng.choice(list(choices))
+
+def generate_bank(path, n, rng):
+    """Write a question bank file with n made-up questions of every type."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            q_type = ("multiple_choice", "true_false", "numerical")[i % 3]
+            if q_type == "multiple_choice":
+                options = [f"Option {j} for {i}" for j in range(4)]
+                record = {"type": q_type, "question": f"Question {i}?", "answer": options[0], "options": options}
+            elif q_type == "true_false":
+                record = {"type": q_type, "question": f"Statement {i}", "answer": rng.choice(["True", "False"]),
+                          "explanation": f"Explanation {i}."}
+            else:
+                record = {"type": q_type, "question": f"Number {i}?", "answer": str(rng.randint(0, 1000)),
+                          "explanation": f"Explanation {i}."}
+            f.write(json.dumps(record) + '\n')
+    build_index(path)
+
+def generate_results(path, n, rng, participants=1000):
+    """Write a version 3 results file with n made-up results."""
+    start = datetime(2025, 1, 1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULTS_HEADER)
+        for i in range(n):
+            attempted = rng.randint(1, 15)
+            score = rng.randint(0, attempted)
+            date = (start + timedelta(seconds=i * 30)).strftime("%Y-%m-%d %H:%M:%S")
+            writer.writerow([f"Participant {rng.randrange(participants)}", score, (score / attempted) * 100,
+                             attempted, date])
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    total = sum(latencies)
+
+    def percentile(p):
+        return latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(f"  {label:<24} {len(latencies) / total:>12.0f}/s   p50 {percentile(50):8.3f} ms   "
+          f"p95 {percentile(95):8.3f} ms   p99 {percentile(99):8.3f} ms")
+
+def time_calls(function, repeat):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def make_quiz(folder, bank_file, ui, num_questions=10):
+    quiz = QuizGame(bank_file, seed=1, results=CsvResults(folder / 'results.csv'), ui=ui)
+    ui.quiz = quiz
+    quiz.name = "Benchmark"
+    quiz.num_questions = num_questions
+    return quiz
+
+def run_size(n, repeat, folder):
+    rng = random.Random(n)
+    bank_file = folder / 'bank.jsonl'
+    start = time.perf_counter()
+    generate_bank(bank_file, n, rng)
+    generate_results(folder / 'results.csv', n, rng)
+    print(f"\n{n} questions / {n} results (generated in {time.perf_counter() - start:.1f} s)")
+
+    # Keep the chart cache and question stats with the generated data
+    quiz_version_3.chart_cache_file = folder / 'chart_cache.pickle'
+    quiz_version_3.question_stats_file = folder / 'question_stats.db'
+
+    ui = FakeUI(rng=rng)
+    start = time.perf_counter()
+    quiz = make_quiz(folder, bank_file, ui)
+    print(f"  {'startup (incl. stats)':<24} {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    questions = quiz.select_questions()
+    summarize("select_questions", time_calls(quiz.select_questions, repeat))
+
+    def answer():
+        q_type, question, answer_data = rng.choice(questions)
+        quiz.process_answer(question, ui.enterbox(question, ""), answer_data[0])
+    summarize("process_answer", time_calls(answer, repeat))
+
+    quiz.score = len(quiz.correct_answers)
+    quiz.num_questions = len(quiz.correct_answers) + len(quiz.wrong_answers)
+    quiz.percentage = (quiz.score / quiz.num_questions) * 100
+    summarize("generate_summary", time_calls(quiz.generate_summary, repeat))
+    summarize("save_results", time_calls(quiz.save_results, repeat))
+
+    def plot():
+        quiz.chart = None
+        quiz.plot_results_comparison()
+    summarize("plot_results_comparison", time_calls(plot, max(repeat // 20, 3)))
+
+    def session():
+        session_quiz = make_quiz(folder, bank_file, FakeUI(rng=rng))
+        session_quiz.run_quiz()
+    summarize("run_quiz (10 questions)", time_calls(session, max(repeat // 20, 3)))
+
+class TupleSession:
+    """What QuizGame kept for a participant before quiz_records: the name, the
+    score and lists of (question, answer) tuples."""
+
+    def __init__(self, name):
+        self.name = name
+        self.score = 0
+        self.correct_answers = []
+        self.wrong_answers = []
+
+def answered_session(quiz, rng, compact, num_questions=10):
+    """Make a session that has answered every question, as the server would."""
+    questions = quiz.sampler.sample(num_questions)
+    # Answers arrive as new strings (from a dialog or a request), not the bank's own
+    answers = [''.join(list(answer_data[0] if rng.random() < 0.7 else "0")) for q_type, question, answer_data in questions]
+
+    if compact:
+        session = QuizSession("Participant", [quiz.question_ids[q] for t, q, d in questions], rng.getrandbits(32))
+        for (q_type, question, answer_data), answer in zip(questions, answers):
+            quiz.record_answer(session.answer_sheet, question, answer, quiz.grade_answer(question, answer))
+            session.position += 1
+        return session
+
+    session = TupleSession("Participant")
+    for (q_type, question, answer_data), answer in zip(questions, answers):
+        if quiz.grade_answer(question, answer):
+            session.score += 1
+            session.correct_answers.append((question, answer))
+        else:
+            session.wrong_answers.append((question, answer, answer_data[0]))
+    return session
+
+def measure_memory(sessions=10000):
+    quiz = QuizGame(seed=1)
+    print(f"\nMemory per active session ({sessions} sessions of 10 answered questions)")
+    for label, compact in (("tuples (before)", False), ("compact records", True)):
+        rng = random.Random(0)
+        tracemalloc.start()
+        kept = [answered_session(quiz, rng, compact) for _ in range(sessions)]
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"  {label:<24} {used / len(kept):8.0f} bytes")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the quiz.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="question bank and results file sizes (up to 10000000)")
+    parser.add_argument('--repeat', type=int, default=200, help="calls timed per stage")
+    parser.add_argument('--memory', action='store_true', help="measure memory per session instead")
+    args = parser.parse_args()
+
+    if args.memory:
+        measure_memory()
+        return
+
+    folder = Path(tempfile.mkdtemp(prefix='quiz_benchmark_'))
+    try:
+        for n in args.sizes:
+            # Each size gets its own files, so nothing is left over from the last one
+            size_folder = folder / str(n)
+            size_folder.mkdir()
+            run_size(n, args.repeat, size_folder)
+    finally:
+        shutil.rmtree(folder)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Participant index for the quiz program
+# Keeps a small SQLite file next to the results CSV so "my history" only reads
+# one participant's rows instead of the whole file:
+#   rows     where each of a participant's rows starts in the CSV
+#   rotated  the rows results_maintenance.py moved out of the CSV
+# (Best scores and ranks come from the running totals, see results_stats.py.)
+# The index is only updated while the CSV is locked, and catches up with rows
+# added by other processes by reading just the new end of the CSV. It is
+# rebuilt if the CSV has been replaced or rewritten (e.g. by rotate).
+#
+# Usage: python participant_index.py NAME [--results quiz_results_3.csv]
+
+# Import necessary modules
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from results_db import name_key
+from results_maintenance import normalize_row, segment_rows
+from results_writer import open_locked, tail_check, unlock_file
+
+script_dir = Path(__file__).parent
+
+SCHEMA = """
+-- How much of the CSV is indexed, which file (inode) it was and its last bytes (see results_writer.tail_check)
+CREATE TABLE IF NOT EXISTS indexed (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    end INTEGER NOT NULL,
+    file_id INTEGER,
+    file_check BLOB
+);
+INSERT OR IGNORE INTO indexed VALUES (0, 0, NULL, NULL);
+
+-- Stored by participant, so one participant's rows are next to each other
+CREATE TABLE IF NOT EXISTS rows (
+    name_key TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    PRIMARY KEY (name_key, start)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rotated (
+    id INTEGER PRIMARY KEY,
+    name_key TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    percentage REAL NOT NULL,
+    questions_attempted INTEGER,
+    date TEXT
+);
+CREATE INDEX IF NOT EXISTS rotated_by_name ON rotated (name_key);
+"""
+
+def read_header(f):
+    f.seek(0)
+    return next(csv.reader([f.readline().decode('utf-8')]), [])
+
+class ParticipantIndex:
+    """Name -> row offsets index for a results CSV file."""
+
+    def __init__(self, source):
+        self.source = Path(source)
+        self.path = self.source.with_name(self.source.stem + '_names.db')
+        # Results may be saved from the background ResultsWriter thread
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.sync()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def sync(self):
+        """Index any rows added to the CSV since the index was last updated."""
+        with open_locked(self.source, 'r') as f:
+            try:
+                self.update(f.seek(0, os.SEEK_END))
+            finally:
+                unlock_file(f)
+
+    def update(self, end):
+        """Index the CSV up to byte end. The caller holds the CSV lock (see locked_append)."""
+        with self._lock, self.conn, open(self.source, 'rb') as f:
+            indexed, file_id, file_check = self.conn.execute("SELECT end, file_id, file_check FROM indexed").fetchone()
+            current_id = os.fstat(f.fileno()).st_ino
+            if file_id != current_id or not 0 < indexed <= end or tail_check(f, indexed) != file_check:
+                # A new or rewritten file, so index all of it again
+                self._reset()
+                indexed = 0
+
+            header = read_header(f)
+            name_col = header.index('Name')
+            if indexed == 0:
+                indexed = f.tell()
+            f.seek(indexed)
+
+            def new_rows():
+                nonlocal indexed
+                for line in f:
+                    # A row still being written by a program that doesn't lock is left for next time
+                    if indexed + len(line) > end or not line.endswith(b'\n'):
+                        break
+                    start = indexed
+                    indexed += len(line)
+                    row = next(csv.reader([line.decode('utf-8')]), None)
+                    if not row:
+                        continue
+                    yield name_key(row[name_col]), start
+
+            self.conn.executemany("INSERT OR IGNORE INTO rows VALUES (?, ?)", new_rows())
+            self.conn.execute("UPDATE indexed SET end = ?, file_id = ?, file_check = ?",
+                              (indexed, current_id, tail_check(f, indexed)))
+
+    def _reset(self):
+        """Empty the index and read the rotated rows again; the caller holds the lock and the transaction."""
+        self.conn.execute("DELETE FROM rows")
+        self.conn.execute("DELETE FROM rotated")
+        # Rotated rows never change, so they are kept in the index itself
+        for month, rows in segment_rows(self.source):
+            rows = [(name_key(name), score, percentage, attempted, date)
+                    for name, score, percentage, attempted, date in rows]
+            self.conn.executemany("INSERT INTO rotated (name_key, score, percentage, questions_attempted, date) "
+                                  "VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _rotated(self, key):
+        return self._query("SELECT score, percentage, questions_attempted, date FROM rotated "
+                           "WHERE name_key = ? ORDER BY id", (key,))
+
+    def history(self, name):
+        """The participant's results as (score, percentage, questions_attempted, date), oldest first."""
+        key = name_key(name)
+        while True:
+            end, file_id, file_check = self._query("SELECT end, file_id, file_check FROM indexed")[0]
+            rotated = self._rotated(key)
+            starts = self._query("SELECT start FROM rows WHERE name_key = ? ORDER BY start", (key,))
+            with open(self.source, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino == file_id and tail_check(f, end) == file_check:
+                    header = read_header(f)
+                    rows = []
+                    for (start,) in starts:
+                        f.seek(start)
+                        values = next(csv.reader([f.readline().decode('utf-8')]), [])
+                        rows.append(tuple(normalize_row(dict(zip(header, values)))[1:]))
+                    return rotated + rows
+            # The CSV was replaced or rewritten since the index was updated, so the offsets are out of date
+            self.sync()
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up a participant's results.")
+    parser.add_argument('name')
+    parser.add_argument('--results', type=Path, default=script_dir / 'quiz_results_3.csv')
+    args = parser.parse_args()
+
+    from quiz_version_3 import CsvResults
+    results = CsvResults(args.results)
+    history = results.history(args.name)
+    if not history:
+        print(f"No results for {args.name}.")
+    else:
+        for score, percentage, attempted, date in history:
+            print(f"{date or 'No date':<19}  {score}/{attempted or '?'}  ({percentage:.1f}%)")
+        print(f"Best: {results.best(args.name):.1f}%   "
+              f"Rank: {results.rank(args.name)} of {results.stats.participants()}")
+    results.close()
+
+if __name__ == "__main__":
+    main()
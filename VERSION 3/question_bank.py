@@ -0,0 +1,203 @@
+# On-disk question bank for the quiz program
+# Questions are stored one JSON object per line, with a separate index of line
+# offsets. Both files are memory-mapped, so only the questions that are actually
+# asked get read and parsed, no matter how big the bank is.
+#
+# Questions are also indexed by type, so a quiz of k questions can be drawn in
+# O(k) time, either uniformly or with a weighting for each question type.
+#
+# Usage: python question_bank.py export questions_bank.jsonl   (write the built-in questions)
+#        python question_bank.py index questions_bank.jsonl    (rebuild the offset index)
+
+# Import necessary modules
+import json
+import mmap
+import random
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+# Extra data stored with each question type (the second item of answer_data)
+EXTRA_FIELDS = {
+    "multiple_choice": "options",
+    "true_false": "explanation",
+    "numerical": "explanation",
+    "short_answer": "explanation"
+}
+
+def export_bank(questions_bank, path):
+    """Write a questions_bank dict (as used by QuizGame) to a bank file and index it."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for q_type, questions in questions_bank.items():
+            for question, (answer, extra) in questions.items():
+                record = {"type": q_type, "question": question, "answer": answer, EXTRA_FIELDS[q_type]: extra}
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    build_index(path)
+
+def build_index(path):
+    """Write the index files for a bank file.
+
+    <bank>.idx holds the byte offset of every line, <bank>.order holds the
+    line numbers of the questions (not blank lines) grouped by type and <bank>.types.json holds where each
+    type's group starts and ends in the .order file.
+    """
+    path = Path(path)
+    offsets = array('Q', [0])
+    numbers_by_type = {}
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f):
+            offsets.append(offsets[-1] + len(line))
+            # Blank lines (e.g. at the end of the file) aren't questions, but still take up bytes
+            if not line.strip():
+                continue
+            q_type = json.loads(line)["type"]
+            numbers_by_type.setdefault(q_type, array('Q')).append(number)
+
+    order = array('Q')
+    type_ranges = {}
+    for q_type, numbers in numbers_by_type.items():
+        type_ranges[q_type] = [len(order), len(order) + len(numbers)]
+        order.extend(numbers)
+
+    with open(path.with_suffix('.idx'), 'wb') as f:
+        offsets.tofile(f)
+    with open(path.with_suffix('.order'), 'wb') as f:
+        order.tofile(f)
+    path.with_suffix('.types.json').write_text(json.dumps(type_ranges))
+
+class QuestionSampler:
+    """Draws k different questions in O(k) from questions grouped by type."""
+
+    def __init__(self, strata, rng=None):
+        # strata maps each question type to a sequence of (q_type, question, answer_data)
+        self.strata = strata
+        self.rng = rng if rng is not None else random.Random()
+
+    @classmethod
+    def from_dict(cls, questions_bank, rng=None):
+        strata = {}
+        for q_type, questions in questions_bank.items():
+            strata[q_type] = [(q_type, question, answer_data) for question, answer_data in questions.items()]
+        return cls(strata, rng)
+
+    def __len__(self):
+        return sum(len(questions) for questions in self.strata.values())
+
+    def sample(self, k, weights=None):
+        """Pick k different questions in random order.
+
+        Without weights every question is equally likely. With weights (a
+        dict of question type -> weight) each pick first chooses a type in
+        proportion to its weight, skipping types that have run out, so fewer
+        than k questions come back if the weighted types run out.
+        """
+        sizes = {q_type: len(questions) for q_type, questions in self.strata.items()}
+        k = min(k, sum(sizes.values()))
+
+        if weights is None:
+            # Pick positions across all types at once, then find which type each falls in
+            types = list(sizes)
+            ends = []
+            total = 0
+            for q_type in types:
+                total += sizes[q_type]
+                ends.append(total)
+            picked = {q_type: [] for q_type in types}
+            for position in self.rng.sample(range(total), k):
+                t = bisect_right(ends, position)
+                picked[types[t]].append(position - (ends[t] - sizes[types[t]]))
+        else:
+            counts = dict.fromkeys(sizes, 0)
+            for _ in range(k):
+                available = [q_type for q_type in sizes if counts[q_type] < sizes[q_type] and weights.get(q_type, 0) > 0]
+                if not available:
+                    break
+                q_type = self.rng.choices(available, [weights[t] for t in available])[0]
+                counts[q_type] += 1
+            picked = {q_type: self.rng.sample(range(sizes[q_type]), count) for q_type, count in counts.items()}
+
+        selected = []
+        for q_type, positions in picked.items():
+            questions = self.strata[q_type]
+            selected.extend(questions[i] for i in positions)
+        self.rng.shuffle(selected)
+        return selected
+
+class QuestionBank:
+    """Read-only, memory-mapped view of a bank file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        index_paths = [self.path.with_suffix(suffix) for suffix in ('.idx', '.order', '.types.json')]
+        bank_mtime = self.path.stat().st_mtime
+        if any(not p.exists() or p.stat().st_mtime < bank_mtime for p in index_paths):
+            build_index(self.path)
+
+        self._files = [open(p, 'rb') for p in [self.path] + index_paths[:2]]
+        self._data, self._index, self._order_data = [self._map(f) for f in self._files]
+        self._offsets = memoryview(self._index).cast('Q')
+        self._order = memoryview(self._order_data).cast('Q')
+        self.type_ranges = json.loads(index_paths[2].read_text())
+
+    @staticmethod
+    def _map(f):
+        # mmap can't map an empty file, so fall back to an empty buffer
+        if f.seek(0, 2) == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        # Only lines that hold a question are in the order file
+        return len(self._order)
+
+    def __getitem__(self, i):
+        """Return question i as (q_type, question, answer_data) like QuizGame uses."""
+        record = json.loads(self._data[self._offsets[i]:self._offsets[i + 1]])
+        q_type = record["type"]
+        return q_type, record["question"], (record["answer"], record[EXTRA_FIELDS[q_type]])
+
+    def strata(self):
+        """Questions grouped by type, as lazy sequences for QuestionSampler."""
+        return {q_type: BankSlice(self, self._order[start:end]) for q_type, (start, end) in self.type_ranges.items()}
+
+    def close(self):
+        self._offsets.release()
+        self._order.release()
+        for buffer in (self._data, self._index, self._order_data):
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+        for f in self._files:
+            f.close()
+
+class BankSlice:
+    """The questions of one type in a QuestionBank, only parsed when accessed."""
+
+    def __init__(self, bank, numbers):
+        self.bank = bank
+        self.numbers = numbers
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __getitem__(self, i):
+        return self.bank[self.numbers[i]]
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[1] not in ('export', 'index'):
+        print("Usage: python question_bank.py export|index <bank file>")
+        sys.exit(1)
+
+    path = Path(sys.argv[2])
+    if sys.argv[1] == 'export':
+        from quiz_version_3 import QuizGame
+        export_bank(QuizGame().questions_bank, path)
+    else:
+        build_index(path)
+
+    bank = QuestionBank(path)
+    print(f"{path} has {len(bank)} questions.")
+    bank.close()
+
+if __name__ == "__main__":
+    main()
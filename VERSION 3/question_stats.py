@@ -0,0 +1,188 @@
+# Question statistics and adaptive question selection for the quiz program
+# QuestionStats keeps how many times each question has been answered and how
+# many of those answers were correct, in a small SQLite file. Only the counts of
+# the questions a session looks at are read, and saving only adds this
+# session's counts, so neither depends on how many questions the bank has.
+# AdaptiveSelector uses those counts as each question's difficulty and keeps
+# picking questions close to the participant's current ability, which gives a
+# steadier score from fewer questions than picking at random.
+
+# Import necessary modules
+import math
+import random
+import sqlite3
+import threading
+from hashlib import blake2b
+
+# Difficulties (in logits) are grouped into this many buckets between -LIMIT and LIMIT
+BUCKETS = 12
+LIMIT = 3.0
+# Questions looked up per query when loading many at once
+LOAD_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counts (
+    key INTEGER PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL
+);
+"""
+
+ADD_COUNTS = ("INSERT INTO counts VALUES (?, ?, ?) ON CONFLICT (key) "
+              "DO UPDATE SET attempts = attempts + excluded.attempts, correct = correct + excluded.correct")
+
+def question_key(question):
+    """A stable 64-bit key for a question, so the stats file doesn't store question text."""
+    return int.from_bytes(blake2b(question.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+def logit(p):
+    return math.log(p / (1 - p))
+
+class QuestionStats:
+    """Answer counts for each question, read from the file only when they are needed."""
+
+    def __init__(self, path):
+        self.path = path
+        # key -> [attempts, correct] for the questions looked at so far
+        self.counts = {}
+        # Counts recorded since the last save, added to the file when saving
+        self.pending = {}
+        # save() may run in another thread (e.g. the quiz server's) while answers are recorded
+        self._lock = threading.Lock()
+        try:
+            self.conn = self._open()
+        except sqlite3.DatabaseError:
+            # A damaged file only loses the counts, never the quiz
+            path.replace(path.with_name(path.name + '.damaged'))
+            self.conn = self._open()
+
+    def _open(self):
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    @staticmethod
+    def _add(counts, key, attempts, correct):
+        entry = counts.setdefault(key, [0, 0])
+        entry[0] += attempts
+        entry[1] += correct
+
+    def load(self, questions):
+        """Read the saved counts of several questions at once (e.g. adaptive candidates)."""
+        with self._lock:
+            keys = [key for key in map(question_key, questions) if key not in self.counts]
+            for i in range(0, len(keys), LOAD_BATCH):
+                batch = keys[i:i + LOAD_BATCH]
+                for key in batch:
+                    self.counts[key] = [0, 0]
+                rows = self._read(f"SELECT key, attempts, correct FROM counts WHERE key IN "
+                                  f"({', '.join('?' * len(batch))})", batch)
+                for key, attempts, correct in rows:
+                    self._add(self.counts, key, attempts, correct)
+
+    def _get(self, key):
+        """Counts for a key, read from the file the first time; the caller holds the lock."""
+        entry = self.counts.get(key)
+        if entry is None:
+            rows = self._read("SELECT attempts, correct FROM counts WHERE key = ?", (key,))
+            entry = self.counts[key] = list(rows[0]) if rows else [0, 0]
+        return entry
+
+    def _read(self, sql, params):
+        try:
+            return self.conn.execute(sql, params).fetchall()
+        except sqlite3.DatabaseError:
+            # Counts that can't be read are treated as unseen questions
+            return []
+
+    def record(self, question, is_correct):
+        key = question_key(question)
+        with self._lock:
+            entry = self._get(key)
+            entry[0] += 1
+            entry[1] += bool(is_correct)
+            self._add(self.pending, key, 1, bool(is_correct))
+
+    def difficulty(self, question):
+        """Difficulty in logits: 0 is average, higher is harder. Unseen questions count as average."""
+        with self._lock:
+            attempts, correct = self._get(question_key(question))
+        # Add one right and one wrong answer so new questions don't get extreme values
+        return -logit((correct + 1) / (attempts + 2))
+
+    def save(self):
+        """Add this session's counts to the file, keeping counts saved by other sessions."""
+        # Answers recorded while saving go into the next save
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        try:
+            # Saving uses its own connection, so answers can still be looked up while it waits for
+            # another process, and one transaction saves all of the counts or none of them
+            conn = sqlite3.connect(str(self.path))
+            try:
+                with conn:
+                    conn.executemany(ADD_COUNTS, [(key, a, c) for key, (a, c) in pending.items()])
+            finally:
+                conn.close()
+        except BaseException:
+            # Keep the counts so a later save can try again
+            with self._lock:
+                for key, (a, c) in pending.items():
+                    self._add(self.pending, key, a, c)
+            raise
+
+    def close(self):
+        self.conn.close()
+
+def bucket_of(difficulty):
+    position = (difficulty + LIMIT) / (2 * LIMIT) * BUCKETS
+    return min(max(int(position), 0), BUCKETS - 1)
+
+class AdaptiveSelector:
+    """Picks each next question close to the participant's estimated ability.
+
+    Questions are kept in difficulty buckets, so picking one only looks at a
+    fixed number of buckets and removes a random question in O(1).
+    """
+
+    def __init__(self, questions, stats, rng=None):
+        self.stats = stats
+        self.rng = rng if rng is not None else random.Random()
+        stats.load(entry[1] for entry in questions)
+        self.buckets = [[] for _ in range(BUCKETS)]
+        for entry in questions:
+            self.buckets[bucket_of(stats.difficulty(entry[1]))].append(entry)
+        self.answered = 0
+        self.correct = 0
+        self.difficulty_total = 0.0
+
+    def ability(self):
+        """Estimated ability in logits, on the same scale as question difficulty."""
+        if not self.answered:
+            return 0.0
+        own = logit((self.correct + 0.5) / (self.answered + 1))
+        return own + self.difficulty_total / self.answered
+
+    def next_question(self):
+        """Remove and return the unused question closest to the participant's ability, or None."""
+        target = bucket_of(self.ability())
+        for distance in range(BUCKETS):
+            for b in (target - distance, target + distance):
+                if 0 <= b < BUCKETS and self.buckets[b]:
+                    bucket = self.buckets[b]
+                    i = self.rng.randrange(len(bucket))
+                    bucket[i], bucket[-1] = bucket[-1], bucket[i]
+                    return bucket.pop()
+        return None
+
+    def record(self, question, is_correct):
+        self.answered += 1
+        self.correct += bool(is_correct)
+        self.difficulty_total += self.stats.difficulty(question)
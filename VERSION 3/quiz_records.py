@@ -0,0 +1,45 @@
+# Compact records for quiz sessions
+# Instead of lists of (question, answer) tuples, a session's answers are kept in
+# typed arrays of small integers: the question's id (see QuizGame.question_ids)
+# and the position of the answer in the question's choices. Only typed answers
+# (e.g. numerical questions) keep their text.
+
+# Import necessary modules
+from array import array
+
+class AnswerSheet:
+    """The answers given in one quiz session."""
+
+    __slots__ = ('question_ids', 'answer_codes', 'results', 'typed_answers')
+
+    # Answer code for an answer that isn't one of the question's choices
+    TYPED = -1
+
+    def __init__(self):
+        self.question_ids = array('I')
+        self.answer_codes = array('b')
+        self.results = bytearray()
+        # position -> answer text, only for typed answers
+        self.typed_answers = None
+
+    def add(self, question_id, answer_code, is_correct, typed_answer=None):
+        if answer_code == self.TYPED:
+            if self.typed_answers is None:
+                self.typed_answers = {}
+            self.typed_answers[len(self.results)] = typed_answer
+        self.question_ids.append(question_id)
+        self.answer_codes.append(answer_code)
+        self.results.append(is_correct)
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def score(self):
+        return self.results.count(1)
+
+    def __iter__(self):
+        """Yield (question id, answer code, is correct, typed answer) for each answer."""
+        for i, question_id in enumerate(self.question_ids):
+            typed_answer = self.typed_answers.get(i) if self.typed_answers else None
+            yield question_id, self.answer_codes[i], bool(self.results[i]), typed_answer
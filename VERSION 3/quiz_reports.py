@@ -0,0 +1,103 @@
+# Reports for the quiz program
+# Writes quiz summaries piece by piece to any writer (a file, a list, ...)
+# instead of building one long string, and exports a report for every
+# participant in a results file or database as text or HTML files.
+#
+# Usage: python quiz_reports.py quiz_results_3.csv|quiz_results.db [--out reports] [--format text|html]
+
+# Import necessary modules
+import argparse
+import html
+import re
+import time
+from hashlib import blake2b
+from pathlib import Path
+
+def write_summary(write, name, score, num_questions, percentage, answers):
+    """Write a quiz summary with write(), for (question, answer, correct answer, is correct) answers."""
+    answers = list(answers)
+    write(f"Quiz Summary for {name}\n\n")
+    write(f"Score: {score}/{num_questions} ({percentage:.1f}%)\n\n")
+
+    write("Correct Answers:\n")
+    for q, a, c, is_correct in answers:
+        if is_correct:
+            write(f"✓ {q}\n   Your answer: {a}\n\n")
+
+    write("Incorrect Answers:\n")
+    for q, a, c, is_correct in answers:
+        if not is_correct:
+            write(f"✗ {q}\n   Your answer: {a}\n   Correct answer: {c}\n\n")
+
+def write_text_report(write, name, rows):
+    """Write a participant's results history as text. rows are (score, percentage, attempted, date)."""
+    percentages = [percentage for score, percentage, attempted, date in rows]
+    write(f"Quiz Report for {name}\n\n")
+    write(f"Attempts: {len(rows)}\n")
+    write(f"Best score: {max(percentages):.1f}%\n")
+    write(f"Average score: {sum(percentages) / len(percentages):.1f}%\n\n")
+    write("History:\n")
+    for score, percentage, attempted, date in rows:
+        write(f"  {date or 'No date':<19}  {score}/{attempted or '?'}  ({percentage:.1f}%)\n")
+
+def write_html_report(write, name, rows):
+    """Write a participant's results history as an HTML page."""
+    percentages = [percentage for score, percentage, attempted, date in rows]
+    name = html.escape(name)
+    write(f"<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>Quiz Report for {name}</title></head>\n<body>\n")
+    write(f"<h1>Quiz Report for {name}</h1>\n")
+    write(f"<p>Attempts: {len(rows)}<br>Best score: {max(percentages):.1f}%<br>"
+          f"Average score: {sum(percentages) / len(percentages):.1f}%</p>\n")
+    write("<table>\n<tr><th>Date</th><th>Score</th><th>Percentage</th></tr>\n")
+    for score, percentage, attempted, date in rows:
+        write(f"<tr><td>{html.escape(date or 'No date')}</td><td>{score}/{attempted or '?'}</td>"
+              f"<td>{percentage:.1f}%</td></tr>\n")
+    write("</table>\n</body>\n</html>\n")
+
+def report_file_name(name, suffix):
+    """A file name for a participant's report. Names that had to be changed get
+    part of a hash added, so "Jo Smith" and "Jo.Smith" don't share a file."""
+    key = name.strip().casefold()
+    base = re.sub(r'[^\w-]', '_', key)
+    if base != key or not base:
+        base += '_' + blake2b(key.encode('utf-8'), digest_size=4).hexdigest()
+    return base + suffix
+
+def export_reports(results, out_dir, report_format='text'):
+    """Write one report file per participant of a results backend and return how many were written."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_report, suffix = (write_html_report, '.html') if report_format == 'html' else (write_text_report, '.txt')
+
+    count = 0
+    for name in results.names():
+        rows = results.history(name)
+        if not rows:
+            continue
+        with open(out_dir / report_file_name(name, suffix), 'w', encoding='utf-8') as f:
+            write_report(f.write, name, rows)
+        count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a report for every participant.")
+    parser.add_argument('results_file', type=Path, help="results CSV from any version of the quiz, or a results database")
+    parser.add_argument('--out', type=Path, default=Path('reports'), help="folder for the reports")
+    parser.add_argument('--format', choices=['text', 'html'], default='text')
+    args = parser.parse_args()
+
+    if args.results_file.suffix == '.db':
+        from results_db import SqliteResults
+        results = SqliteResults(args.results_file)
+    else:
+        from quiz_version_3 import CsvResults
+        results = CsvResults(args.results_file)
+
+    start = time.perf_counter()
+    count = export_reports(results, args.out, args.format)
+    elapsed = time.perf_counter() - start
+    results.close()
+    print(f"Wrote {count} reports to {args.out} in {elapsed:.2f} seconds "
+          f"({count / elapsed if elapsed else 0:.0f} reports per second).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# Quiz server for the quiz program
+# Runs many quiz sessions at once in one process using asyncio, with a small
+# JSON-over-HTTP interface. The questions and grading come from QuizGame, while
+# each participant's score and answers are kept in their own QuizSession.
+#
+# Usage: python quiz_server.py [--host 127.0.0.1] [--port 8000] [--bank questions.jsonl]
+#
+#   POST /sessions                {"name": ..., "age": ..., "num_questions": ...}
+#   GET  /sessions/<id>           current question or final result
+#   POST /sessions/<id>/answer    {"answer": ...}
+
+# Import necessary modules
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from array import array
+from datetime import datetime
+from http import HTTPStatus
+from pathlib import Path
+
+from quiz_records import AnswerSheet
+from quiz_version_3 import QuizGame
+from results_db import SqliteResults
+from results_writer import ResultsWriter
+
+# Sessions with no requests for this many seconds are removed
+SESSION_TIMEOUT = 30 * 60
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 64 * 1024
+
+class RequestError(Exception):
+    """Raised to send an error response back to the client."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class QuizSession:
+    """The state of one participant's quiz.
+
+    Questions are kept as ids into the QuizGame's question table and answers
+    in an AnswerSheet, so an active session only takes a few hundred bytes.
+    """
+
+    __slots__ = ('session_id', 'name', 'question_ids', 'position', 'answer_sheet', 'seed', 'last_active')
+
+    def __init__(self, name, question_ids, seed):
+        self.session_id = uuid.uuid4().hex
+        self.name = name
+        self.question_ids = array('I', question_ids)
+        self.position = 0
+        self.answer_sheet = AnswerSheet()
+        # Option orders are worked out from the seed instead of being stored
+        self.seed = seed
+        self.last_active = time.monotonic()
+
+    @property
+    def finished(self):
+        return self.position >= len(self.question_ids)
+
+    @property
+    def score(self):
+        return self.answer_sheet.score
+
+    @property
+    def percentage(self):
+        return (self.score / len(self.question_ids)) * 100
+
+    def options(self, choices):
+        """This session's order of the current question's options (the bank isn't changed)."""
+        return random.Random(self.seed + self.position).sample(choices, len(choices))
+
+    def state(self, quiz):
+        if self.finished:
+            answers = list(quiz.read_answers(self.answer_sheet))
+            return {
+                "session_id": self.session_id,
+                "finished": True,
+                "score": self.score,
+                "num_questions": len(self.question_ids),
+                "percentage": self.percentage,
+                "correct_answers": [(q, a) for q, a, c, is_correct in answers if is_correct],
+                "wrong_answers": [(q, a, c) for q, a, c, is_correct in answers if not is_correct]
+            }
+
+        q_type, question, answer_data, choices = quiz.questions_by_id[self.question_ids[self.position]]
+        data = {
+            "session_id": self.session_id,
+            "finished": False,
+            "number": self.position + 1,
+            "num_questions": len(self.question_ids),
+            "type": q_type,
+            "question": question
+        }
+        if q_type == "multiple_choice":
+            data["choices"] = self.options(choices)
+        elif q_type == "true_false":
+            data["choices"] = list(choices)
+        return data
+
+class QuizServer:
+    def __init__(self, quiz, save_results=True):
+        # The QuizGame is only used for its questions and grading
+        self.quiz = quiz
+        self.save_results = save_results
+        self.sessions = {}
+        if save_results:
+            quiz.initialize_results_file()
+            # Finished sessions are saved in batches by a background thread
+            self.writer = ResultsWriter(quiz.save_result_rows)
+
+    def start_session(self, body):
+        name = str(body.get("name", "")).strip()
+        if len(name) < 2:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Please enter a valid name (at least 2 characters).")
+
+        age = body.get("age")
+        if not isinstance(age, int) or not self.quiz.MIN_AGE <= age <= self.quiz.MAX_AGE:
+            raise RequestError(HTTPStatus.FORBIDDEN,
+                               f"Sorry, this quiz is only for participants aged {self.quiz.MIN_AGE}-{self.quiz.MAX_AGE}.")
+
+        total_questions = len(self.quiz.sampler)
+        num_questions = body.get("num_questions", 5)
+        if not isinstance(num_questions, int) or not 1 <= num_questions <= total_questions:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"num_questions must be between 1 and {total_questions}.")
+
+        questions = self.quiz.sampler.sample(num_questions, self.quiz.question_weights)
+        if self.quiz.bank is not None:
+            for q_type, question, answer_data in questions:
+                self.quiz.add_to_answer_key(q_type, question, answer_data)
+
+        question_ids = [self.quiz.question_ids[question] for q_type, question, answer_data in questions]
+        session = QuizSession(name, question_ids, self.quiz.rng.getrandbits(32))
+        self.sessions[session.session_id] = session
+        return session.state(self.quiz)
+
+    def answer(self, session, body):
+        if session.finished:
+            raise RequestError(HTTPStatus.CONFLICT, "This quiz is already finished.")
+        if "answer" not in body:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Missing answer.")
+
+        finishing = session.position + 1 == len(session.question_ids)
+        if finishing and self.save_results and self.writer.full():
+            # Waiting for the writer would stop every session, so the client sends the answer again later
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "Too many results are waiting to be saved, please try again.")
+
+        q_type, question, answer_data, choices = self.quiz.questions_by_id[session.question_ids[session.position]]
+        user_answer = body["answer"]
+        correct_answer = answer_data[0]
+        is_correct = self.quiz.grade_answer(question, user_answer)
+        self.quiz.record_answer(session.answer_sheet, question, user_answer, is_correct)
+        session.position += 1
+
+        result = {"correct": is_correct, "correct_answer": correct_answer}
+        if q_type != "multiple_choice":
+            result["explanation"] = answer_data[1]
+        if session.finished and self.save_results:
+            current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Only this event loop adds rows, and the queue wasn't full above, so this never waits
+            self.writer.write([session.name, session.score, session.percentage,
+                               len(session.question_ids), current_date], block=False)
+        result["next"] = session.state(self.quiz)
+        return result
+
+    def route(self, method, path, body):
+        parts = [part for part in path.split('/') if part]
+        if parts == ["sessions"] and method == "POST":
+            return HTTPStatus.CREATED, self.start_session(body)
+
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session = self.sessions.get(parts[1])
+            if session is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, "Unknown session.")
+            session.last_active = time.monotonic()
+            if len(parts) == 2 and method == "GET":
+                return HTTPStatus.OK, session.state(self.quiz)
+            if parts[2:] == ["answer"] and method == "POST":
+                return HTTPStatus.OK, self.answer(session, body)
+
+        raise RequestError(HTTPStatus.NOT_FOUND, "Not found.")
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    # When the body isn't read, the rest of the connection can't be understood
+                    length = headers.get('content-length', '0')
+                    if not (length.isascii() and length.isdigit()):
+                        keep_alive = False
+                        raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length.")
+                    length = int(length)
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+                    raw_body = await reader.readexactly(length) if length else b''
+                    try:
+                        body = json.loads(raw_body) if raw_body else {}
+                    except ValueError:
+                        raise RequestError(HTTPStatus.BAD_REQUEST, "Request body must be JSON.")
+                    if not isinstance(body, dict):
+                        raise RequestError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+                    status, data = self.route(method.upper(), path, body)
+                except RequestError as error:
+                    status, data = error.status, {"error": error.message}
+
+                payload = json.dumps(data).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def remove_idle_sessions(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - SESSION_TIMEOUT
+            for session_id in [s.session_id for s in self.sessions.values() if s.last_active < cutoff]:
+                del self.sessions[session_id]
+            # Save the answer counts collected since last time, without stopping the other sessions
+            await loop.run_in_executor(None, self.quiz.question_stats.save)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        cleanup = asyncio.create_task(self.remove_idle_sessions())
+        print(f"Quiz server running on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            cleanup.cancel()
+            try:
+                if self.save_results:
+                    # Raises ResultsNotSaved if some results still couldn't be saved
+                    self.writer.close()
+            finally:
+                self.quiz.question_stats.save()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many quiz sessions over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--bank', type=Path, help="question bank file (see question_bank.py)")
+    parser.add_argument('--db', type=Path, help="save results to this SQLite database instead of the CSV file")
+    args = parser.parse_args()
+
+    results = None
+    if args.db is not None:
+        results = SqliteResults(args.db)
+    server = QuizServer(QuizGame(args.bank, results=results))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
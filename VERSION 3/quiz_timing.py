@@ -0,0 +1,126 @@
+# Timing instrumentation for the quiz program
+# Off by default. Set QUIZ_TIMING_FILE to record the wall and CPU time of each
+# stage of a quiz, including a histogram of each stage's times. The welcome and
+# ask_* stages time how long the participant took to answer; the others (grading,
+# the summary, saving, drawing the chart) never include waiting for a dialog. A file ending in .prom
+# is written in the Prometheus text format, anything else gets one JSON line
+# per session appended. Set QUIZ_PROFILE_FILE to also run the whole quiz under
+# cProfile and save the stats there.
+
+# Import necessary modules
+import cProfile
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.01, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+class StageTimer:
+    """Wall time, CPU time and a latency histogram for each named stage."""
+
+    def __init__(self, output_file):
+        self.output_file = Path(output_file)
+        # stage -> [calls, wall seconds, cpu seconds, bucket counts]
+        self.stages = {}
+
+    @classmethod
+    def from_environment(cls):
+        output_file = os.environ.get('QUIZ_TIMING_FILE')
+        return cls(output_file) if output_file else None
+
+    @contextmanager
+    def stage(self, name):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+    def record(self, name, wall, cpu):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = [0, 0.0, 0.0, [0] * len(BUCKETS)]
+        entry[0] += 1
+        entry[1] += wall
+        entry[2] += cpu
+        for i, bound in enumerate(BUCKETS):
+            if wall <= bound:
+                entry[3][i] += 1
+                break
+
+    def export(self, session=None):
+        if self.output_file.suffix == '.prom':
+            self.export_prometheus()
+        else:
+            self.export_jsonl(session)
+
+    def export_jsonl(self, session=None):
+        record = {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "session": session,
+            "stages": {
+                name: {
+                    "calls": calls,
+                    "wall_seconds": wall,
+                    "cpu_seconds": cpu,
+                    "histogram": {str(bound): n for bound, n in zip(BUCKETS, buckets)}
+                }
+                for name, (calls, wall, cpu, buckets) in self.stages.items()
+            }
+        }
+        with open(self.output_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def export_prometheus(self):
+        lines = [
+            "# HELP quiz_stage_seconds Wall time spent in each quiz stage.",
+            "# TYPE quiz_stage_seconds histogram"
+        ]
+        for name, (calls, wall, cpu, buckets) in self.stages.items():
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'quiz_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'quiz_stage_seconds_sum{{stage="{name}"}} {wall}')
+            lines.append(f'quiz_stage_seconds_count{{stage="{name}"}} {calls}')
+        lines.append("# HELP quiz_stage_cpu_seconds_total CPU time spent in each quiz stage.")
+        lines.append("# TYPE quiz_stage_cpu_seconds_total counter")
+        for name, (calls, wall, cpu, buckets) in self.stages.items():
+            lines.append(f'quiz_stage_cpu_seconds_total{{stage="{name}"}} {cpu}')
+
+        # Replace the file in one step so a collector never reads half of it
+        temp_file = self.output_file.with_suffix('.tmp')
+        temp_file.write_text('\n'.join(lines) + '\n')
+        temp_file.replace(self.output_file)
+
+def timed(stage):
+    """Time a QuizGame method as the given stage when its timer is switched on."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.timer is None:
+                return method(self, *args, **kwargs)
+            with self.timer.stage(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def stage(timer, name):
+    """Time a block as the given stage when timer isn't None."""
+    return timer.stage(name) if timer is not None else nullcontext()
+
+def profiler_from_environment():
+    """Start cProfile if QUIZ_PROFILE_FILE is set. Returns (profiler, file) or None."""
+    profile_file = os.environ.get('QUIZ_PROFILE_FILE')
+    if not profile_file:
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler, profile_file
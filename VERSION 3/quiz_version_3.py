@@ -3,25 +3,168 @@
 # Import necessary modules
 import time
 import sys
-import csv
+import argparse
+import sqlite3
+import traceback
 from datetime import datetime
 import random
-import matplotlib.pyplot as plt
+import uuid
+from functools import lru_cache
+import unicodedata
 from pathlib import Path
 import easygui as gui
+from question_bank import QuestionBank, QuestionSampler
+from results_chart import ChartRenderer, preload_matplotlib, results_snapshot
+from results_stats import ResultsStats
+from participant_index import ParticipantIndex
+from results_writer import locked_append
+from quiz_timing import StageTimer, timed, stage, profiler_from_environment
+from quiz_records import AnswerSheet
+from quiz_reports import write_summary
+from question_stats import QuestionStats, AdaptiveSelector
+from answer_matchers import exact_match, NumericMatcher, FuzzyMatcher
+from session_log import SessionLog, SessionLedger
 
 # Define script directory and results file
 script_dir = Path(__file__).parent
 results_file = script_dir / 'quiz_results_3.csv'
+chart_cache_file = script_dir / 'results_chart_cache.pickle'
+question_stats_file = script_dir / 'question_stats.db'
+RESULTS_HEADER = ['Name', 'Score', 'Percentage', 'Questions_Attempted', 'Date']
+
+# In adaptive mode with a bank file, questions are chosen from this many times
+# the number of questions asked, drawn at random from the bank
+ADAPTIVE_POOL = 20
+# Number of (question, answer) verdicts remembered, since most answers repeat
+VERDICT_CACHE_SIZE = 100000
+# Longer answers are graded without the cache, so it can't fill up with huge keys
+MAX_CACHED_ANSWER = 200
+
+def normalize_answer(answer):
+    """Put an answer into a standard form so answers can be compared directly."""
+    # Same Unicode form, case and spacing (e.g. "Brasília" typed two different ways)
+    text = unicodedata.normalize('NFC', str(answer)).casefold()
+    text = ' '.join(text.split())
+
+    # Numbers are compared by value, so "12", "12.0" and " 12 " all match
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    if number.is_integer():
+        return str(int(number))
+    return repr(number)
+
+# Grader used for each question type (all take normalized answers, see answer_matchers.py)
+GRADERS = {
+    "multiple_choice": exact_match,
+    "true_false": exact_match,
+    "numerical": NumericMatcher(rel_tol=1e-6),
+    "short_answer": FuzzyMatcher()
+}
+
+class CsvResults:
+    """Results backend that appends to the CSV file and keeps ResultsStats up to date.
+
+    Other backends (e.g. SqliteResults in results_db.py) provide the same methods.
+    """
+
+    def __init__(self, path=results_file, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        # Writing no rows still adds the header if the file is new
+        locked_append(path, RESULTS_HEADER, [])
+        self.stats = ResultsStats(path.with_name(path.stem + '_stats.db'), path)
+        # The participant index is only loaded when it is first needed
+        self._index = None
+        self._ledger = None
+
+    def add_rows(self, rows):
+        """Append [name, score, percentage, questions_attempted, date] rows in one go."""
+        # The totals and index are updated before the CSV is unlocked, so they can't miss another process's rows
+        locked_append(self.path, RESULTS_HEADER, rows, self.fsync,
+                      lambda start, end: self.update_stats(rows, start, end))
+
+    def update_stats(self, rows, start, end):
+        try:
+            self.stats.add_rows(rows, start, end)
+            if self._index is not None:
+                self._index.update(end)
+        except sqlite3.Error:
+            # The rows are saved, and the totals and index catch up with them on the next save
+            traceback.print_exc()
+
+    def add_session_rows(self, sessions):
+        """Append the rows of (session id, row) pairs whose session isn't saved yet. Returns rows saved."""
+        # The session ids are kept next to the CSV (see session_log.SessionLedger)
+        if self._ledger is None:
+            self._ledger = SessionLedger(self)
+        return self._ledger.add_session_rows(sessions)
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = ParticipantIndex(self.path)
+        return self._index
+
+    def count(self):
+        return self.stats.count()
+
+    def average(self):
+        return self.stats.average()
+
+    def recent(self, n):
+        """The last n results as (name, percentage, date), oldest first."""
+        return self.stats.recent(n)
+
+    def histogram(self):
+        """Number of results in each 10% score band."""
+        return self.stats.histogram()
+
+    def best_scores(self, top):
+        """The top participants as (name, best percentage), highest first."""
+        return self.stats.best_scores(top)
+
+    def names(self):
+        """Every participant's name, one spelling each."""
+        return self.stats.names()
+
+    def best(self, name):
+        return self.stats.best(name)
+
+    def history(self, name):
+        """The participant's results as (score, percentage, questions_attempted, date), oldest first."""
+        return self.index.history(name)
+
+    def rank(self, name):
+        """The participant's place by best percentage (1 is first), or None."""
+        return self.stats.rank(name)
+
+    def close(self):
+        self.stats.close()
+        if self._index is not None:
+            self._index.close()
+        if self._ledger is not None:
+            self._ledger.close()
 
 class QuizGame:
-    def __init__(self):
+    def __init__(self, bank_file=None, seed=None, results=None, ui=None, adaptive=False, event_log=None):
         self.score = 0
         self.name = ""
         self.MIN_AGE = 12
         self.MAX_AGE = 18
-        self.correct_answers = []
-        self.wrong_answers = []
+        # This session's answers (see correct_answers and wrong_answers)
+        self.answer_sheet = AnswerSheet()
+        # Where results are saved (CsvResults unless another backend is given)
+        self.results = results
+        self.chart = None
+        # Dialogs come from easygui unless another UI with the same functions is given
+        self.gui = ui if ui is not None else gui
+        # Per-stage timing, only when QUIZ_TIMING_FILE is set
+        self.timer = StageTimer.from_environment()
+        # Optional SessionLog that this session's events are appended to
+        self.session_id = uuid.uuid4().hex
+        self.event_log = event_log
         
         # Expanded question bank with different types
         self.questions_bank = {
@@ -45,170 +188,287 @@ class QuizGame:
                 "In which year did World War II end?": ("1945", "World War II ended with Japan's surrender in 1945."),
                 "What is the atomic number of Carbon?": ("6", "Carbon has 6 protons in its nucleus."),
                 "How many planets are in our solar system?": ("8", "Since 2006, when Pluto was reclassified.")
+            },
+            "short_answer": {
+                "Who wrote Romeo and Juliet?": ("William Shakespeare", "Shakespeare wrote it in the 1590s."),
+                "Which gas do plants take in from the air?": ("Carbon Dioxide", "Plants use carbon dioxide for photosynthesis."),
+                "What is the hardest natural substance?": ("Diamond", "Diamond is made of tightly bonded carbon atoms."),
+                "What is the largest ocean on Earth?": ("Pacific", "The Pacific covers about a third of the Earth's surface."),
+                "What is the closest star to the Earth?": ("The Sun", "The next closest, Proxima Centauri, is over 4 light years away.")
             }
         }
 
+        # Verdicts keyed on (question id, normalized answer), so bulk grading of
+        # answers that have been seen before is a single lookup
+        self.cached_verdict = lru_cache(maxsize=VERDICT_CACHE_SIZE)(self.verdict)
+
+        # Compile the answer key once so grading is a single lookup
+        # question -> (normalized correct answer, question type, grader)
+        self.answer_key = {}
+        # Every question also gets a small id, so sessions can refer to it cheaply
+        # id -> (q_type, question, answer_data, choices)
+        self.question_ids = {}
+        self.questions_by_id = []
+        for q_type, questions in self.questions_bank.items():
+            for question, answer_data in questions.items():
+                self.add_to_answer_key(q_type, question, answer_data)
+
+        # Optional on-disk question bank, used instead of the questions above
+        self.bank = None
+        if bank_file is not None:
+            self.bank = QuestionBank(bank_file)
+
+        # Questions are drawn through a sampler so a seed reproduces the same quiz,
+        # and question_weights (question type -> weight) can favour some types
+        self.rng = random.Random(seed)
+        if self.bank is not None:
+            self.sampler = QuestionSampler(self.bank.strata(), self.rng)
+        else:
+            self.sampler = QuestionSampler.from_dict(self.questions_bank, self.rng)
+        self.question_weights = None
+        # Shuffled multiple choice options for this session's questions
+        self.option_orders = {}
+
+        # How often each question is answered correctly, used to pick questions
+        # that suit the participant when adaptive is on
+        self.question_stats = QuestionStats(question_stats_file)
+        self.adaptive = adaptive
+
+    def add_to_answer_key(self, q_type, question, answer_data):
+        # Keep the choices in their original order, since options get shuffled
+        if q_type == "multiple_choice":
+            choices = tuple(answer_data[1])
+        elif q_type == "true_false":
+            choices = ("True", "False")
+        else:
+            choices = ()
+        question_id = self.question_ids.get(question)
+        if question_id is None:
+            self.question_ids[question] = len(self.questions_by_id)
+            self.questions_by_id.append((q_type, question, answer_data, choices))
+        else:
+            if self.answer_key[question][:2] != (normalize_answer(answer_data[0]), q_type):
+                # The cached verdicts for this question used the old answer
+                self.cached_verdict.cache_clear()
+            # Summaries and the server show the same answer that is used for grading
+            self.questions_by_id[question_id] = (q_type, question, answer_data, choices)
+        self.answer_key[question] = (normalize_answer(answer_data[0]), q_type, GRADERS[q_type])
+
+    def log_event(self, event, sync=False, **fields):
+        if self.event_log is not None:
+            self.event_log.write(self.session_id, event, sync=sync, **fields)
+
+    def record_answer(self, answer_sheet, question, user_answer, is_correct):
+        self.question_stats.record(question, is_correct)
+        question_id = self.question_ids[question]
+        choices = self.questions_by_id[question_id][3]
+        if user_answer in choices:
+            answer_sheet.add(question_id, choices.index(user_answer), is_correct)
+        else:
+            answer_sheet.add(question_id, AnswerSheet.TYPED, is_correct, str(user_answer))
+
+    def read_answers(self, answer_sheet):
+        """Yield (question, answer, correct answer, is correct) for each answer on a sheet."""
+        for question_id, answer_code, is_correct, typed_answer in answer_sheet:
+            q_type, question, answer_data, choices = self.questions_by_id[question_id]
+            answer = typed_answer if answer_code == AnswerSheet.TYPED else choices[answer_code]
+            yield question, answer, answer_data[0], is_correct
+
+    @property
+    def correct_answers(self):
+        return [(q, a) for q, a, c, is_correct in self.read_answers(self.answer_sheet) if is_correct]
+
+    @property
+    def wrong_answers(self):
+        return [(q, a, c) for q, a, c, is_correct in self.read_answers(self.answer_sheet) if not is_correct]
+
     def initialize_results_file(self):
-        if not results_file.exists():
-            with open(results_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Name', 'Score', 'Percentage', 'Questions_Attempted', 'Date'])
+        if self.results is None:
+            self.results = CsvResults()
 
     def get_num_questions(self):
-        total_questions = sum(len(q) for q in self.questions_bank.values())
+        total_questions = len(self.sampler)
         while True:
-            num = gui.integerbox(
+            num = self.gui.integerbox(
                 msg=f"How many questions would you like to attempt? (1-{total_questions})",
                 title="Select Number of Questions",
                 lowerbound=1,
                 upperbound=total_questions
             )
             if num is None:
-                if gui.ynbox("Do you want to quit?", "Confirm Quit"):
+                if self.gui.ynbox("Do you want to quit?", "Confirm Quit"):
                     sys.exit()
                 continue
             return num
 
+    @timed("display_welcome")
     def display_welcome(self):
         # Display welcome message using GUI
-        gui.msgbox(
+        self.gui.msgbox(
             msg="Welcome to the Quiz Game!\n\nTest your knowledge with a variety of questions!",
             title="Welcome"
         )
         
         # Validate name
         while True:
-            self.name = gui.enterbox(
+            self.name = self.gui.enterbox(
                 msg="Please enter your name:",
                 title="Quiz Registration"
             )
             if self.name and not self.name.isspace() and len(self.name) >= 2:
                 break
-            gui.msgbox("Please enter a valid name (at least 2 characters).", "Invalid Input")
+            self.gui.msgbox("Please enter a valid name (at least 2 characters).", "Invalid Input")
         
         # Validate age
         while True:
-            age = gui.integerbox(
+            age = self.gui.integerbox(
                 msg="Please enter your age:",
                 title="Age Verification",
                 lowerbound=1,
                 upperbound=100
             )
             if age is None:
-                if gui.ynbox("Do you want to quit?", "Confirm Quit"):
+                if self.gui.ynbox("Do you want to quit?", "Confirm Quit"):
                     sys.exit()
                 continue
             if self.MIN_AGE <= age <= self.MAX_AGE:
-                gui.msgbox("Age verified! You can proceed with the quiz.", "Verification Successful")
+                self.gui.msgbox("Age verified! You can proceed with the quiz.", "Verification Successful")
                 break
-            gui.msgbox(f"Sorry, this quiz is only for participants aged {self.MIN_AGE}-{self.MAX_AGE}.", "Age Restriction")
+            self.gui.msgbox(f"Sorry, this quiz is only for participants aged {self.MIN_AGE}-{self.MAX_AGE}.", "Age Restriction")
             sys.exit()
 
     def ask_multiple_choice(self, question, answer_data):
         correct_answer, options = answer_data
-        random.shuffle(options)
+        # Use this session's order of the options; the shared bank is never shuffled
+        options = self.option_orders.pop(question, None) or self.rng.sample(options, len(options))
         
-        user_answer = gui.buttonbox(
-            msg=question,
-            title="Multiple Choice Question",
-            choices=options
-        )
+        # Only the wait for the answer is timed; grading is its own stage
+        with stage(self.timer, "ask_multiple_choice"):
+            user_answer = self.gui.buttonbox(
+                msg=question,
+                title="Multiple Choice Question",
+                choices=options
+            )
         
         return self.process_answer(question, user_answer, correct_answer)
 
     def ask_true_false(self, question, answer_data):
         correct_answer, explanation = answer_data
         
-        user_answer = gui.buttonbox(
-            msg=question,
-            title="True/False Question",
-            choices=["True", "False"]
-        )
+        with stage(self.timer, "ask_true_false"):
+            user_answer = self.gui.buttonbox(
+                msg=question,
+                title="True/False Question",
+                choices=["True", "False"]
+            )
         
-        is_correct = self.process_answer(question, user_answer, correct_answer)
-        gui.msgbox(explanation, "Explanation")
-        return is_correct
+        return self.process_answer(question, user_answer, correct_answer, explanation)
 
     def ask_numerical(self, question, answer_data):
         correct_answer, explanation = answer_data
         
-        user_answer = gui.enterbox(
-            msg=question,
-            title="Numerical Question"
-        )
+        with stage(self.timer, "ask_numerical"):
+            user_answer = self.gui.enterbox(
+                msg=question,
+                title="Numerical Question"
+            )
         
-        is_correct = self.process_answer(question, user_answer, correct_answer)
-        gui.msgbox(explanation, "Explanation")
-        return is_correct
+        return self.process_answer(question, user_answer, correct_answer, explanation)
 
-    def process_answer(self, question, user_answer, correct_answer):
+    def ask_short_answer(self, question, answer_data):
+        correct_answer, explanation = answer_data
+        
+        with stage(self.timer, "ask_short_answer"):
+            user_answer = self.gui.enterbox(
+                msg=question,
+                title="Short Answer Question"
+            )
+        
+        return self.process_answer(question, user_answer, correct_answer, explanation)
+
+    def process_answer(self, question, user_answer, correct_answer, explanation=None):
         if user_answer is None:
-            if gui.ynbox("Do you want to quit the quiz?", "Confirm Quit"):
+            if self.gui.ynbox("Do you want to quit the quiz?", "Confirm Quit"):
                 sys.exit()
             return False
             
-        if str(user_answer).lower() == str(correct_answer).lower():
-            self.correct_answers.append((question, user_answer))
-            gui.msgbox("✓ Correct!", "Result")
-            return True
+        is_correct = self.grade_answer(question, user_answer)
+        self.record_answer(self.answer_sheet, question, user_answer, is_correct)
+        self.log_event("answer", question=question, answer=str(user_answer), correct=is_correct)
+        # Show the result and explanation together instead of in two dialogs
+        if is_correct:
+            message = "✓ Correct!"
         else:
-            self.wrong_answers.append((question, user_answer, correct_answer))
-            gui.msgbox(f"✗ Incorrect. The correct answer is: {correct_answer}", "Result")
-            return False
+            message = f"✗ Incorrect. The correct answer is: {correct_answer}"
+        if explanation:
+            message += f"\n\n{explanation}"
+        self.gui.msgbox(message, "Result")
+        return is_correct
+
+    @timed("grade_answer")
+    def grade_answer(self, question, user_answer):
+        """Grade an answer without any dialogs. Returns None for an unknown question."""
+        question_id = self.question_ids.get(question)
+        if question_id is None:
+            return None
+        answer = normalize_answer(user_answer)
+        if len(answer) > MAX_CACHED_ANSWER:
+            return self.verdict(question_id, answer)
+        return self.cached_verdict(question_id, answer)
+
+    def verdict(self, question_id, answer):
+        """Grade a normalized answer with the grader for the question's type."""
+        correct_answer, q_type, grader = self.answer_key[self.questions_by_id[question_id][1]]
+        return grader(answer, correct_answer)
 
     def generate_summary(self):
-        summary = f"Quiz Summary for {self.name}\n\n"
-        summary += f"Score: {self.score}/{self.num_questions} ({self.percentage:.1f}%)\n\n"
-        
-        summary += "Correct Answers:\n"
-        for q, a in self.correct_answers:
-            summary += f"✓ {q}\n   Your answer: {a}\n\n"
-            
-        summary += "Incorrect Answers:\n"
-        for q, a, c in self.wrong_answers:
-            summary += f"✗ {q}\n   Your answer: {a}\n   Correct answer: {c}\n\n"
-            
-        gui.textbox("Quiz Summary", "Results", summary)
+        # Build the summary from a list of parts instead of adding to one string
+        with stage(self.timer, "generate_summary"):
+            parts = []
+            write_summary(parts.append, self.name, self.score, self.num_questions, self.percentage,
+                          self.read_answers(self.answer_sheet))
+            summary = ''.join(parts)
+        self.gui.textbox("Quiz Summary", "Results", summary)
 
+    @timed("save_results")
     def save_results(self):
         """Save quiz results to CSV file."""
         current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(results_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([self.name, self.score, self.percentage, self.num_questions, current_date])
+        row = [self.name, self.score, self.percentage, self.num_questions, current_date]
+        # Logged first, so a result that can't be saved here can still be replayed from the log
+        self.log_event("finish", sync=True, row=row)
+        if self.event_log is not None and hasattr(self.results, 'add_session_rows'):
+            # Saved with the session id, so replaying the log into these results doesn't add it again
+            self.results.add_session_rows([(self.session_id, row)])
+        else:
+            self.save_result_rows([row])
+        self.question_stats.save()
+
+    def save_result_rows(self, rows):
+        """Save [name, score, percentage, questions_attempted, date] rows in one go."""
+        self.results.add_rows(rows)
+
+    def start_results_chart(self):
+        """Start drawing the results chart in the background."""
+        # The numbers are read here, so the chart thread never reads results that are being saved
+        self.chart = ChartRenderer(results_snapshot(self.results), chart_cache_file).start()
 
     def plot_results_comparison(self):
         """Create and display results comparison graph."""
-        names, scores, dates = [], [], []
-        with open(results_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                names.append(row['Name'])
-                scores.append(float(row['Percentage']))
-                dates.append(row['Date'] if 'Date' in row else '')
-
-        plt.figure(figsize=(12, 6))
-        bars = plt.bar(range(len(names)), scores)
-        
-        for i, (name, score) in enumerate(zip(names, scores)):
-            if name == self.name and score == self.percentage:
-                bars[i].set_color('green')
-            
-        plt.xlabel('Participants')
-        plt.ylabel('Score (%)')
-        plt.title('Quiz Results Comparison')
-        plt.xticks(range(len(names)), names, rotation=45)
-        plt.axhline(y=sum(scores)/len(scores), color='r', linestyle='--', label='Average Score')
-        plt.legend()
-        plt.tight_layout()
-        
-        # Save the plot to a temporary file and show it using easygui
-        temp_plot = script_dir / 'temp_results.png'
-        plt.savefig(temp_plot)
-        plt.close()
-        
-        gui.msgbox(
-            msg="Here are the quiz results comparison:",
+        with stage(self.timer, "plot_results_comparison"):
+            if self.chart is None:
+                self.start_results_chart()
+
+            # Save the plot to a temporary file and show it using easygui
+            temp_plot = script_dir / 'temp_results.png'
+            self.chart.finish(self.name, self.percentage, temp_plot)
+
+            message = "Here are the quiz results comparison:"
+            rank = self.results.rank(self.name)
+            if rank is not None:
+                message += f"\nYour best score is {self.results.best(self.name):.1f}% (rank {rank})."
+        self.gui.msgbox(
+            msg=message,
             title="Results Comparison",
             image=str(temp_plot)
         )
@@ -216,39 +476,106 @@ class QuizGame:
         # Clean up temporary file
         temp_plot.unlink()
 
+    def select_questions(self):
+        selected_questions = self.sampler.sample(self.num_questions, self.question_weights)
+        # With weights there may be fewer questions than asked for, and the score is out of those
+        self.num_questions = len(selected_questions)
+        if self.bank is not None:
+            # Only the questions picked from the bank file are loaded
+            for q_type, question, answer_data in selected_questions:
+                self.add_to_answer_key(q_type, question, answer_data)
+
+        # Shuffle copies of the options up front, so asking a question does no extra work
+        for q_type, question, answer_data in selected_questions:
+            if q_type == "multiple_choice":
+                self.option_orders[question] = self.rng.sample(answer_data[1], len(answer_data[1]))
+        return selected_questions
+
+    def make_selector(self):
+        if self.bank is not None:
+            candidates = self.sampler.sample(self.num_questions * ADAPTIVE_POOL, self.question_weights)
+            for q_type, question, answer_data in candidates:
+                self.add_to_answer_key(q_type, question, answer_data)
+        else:
+            candidates = [entry[:3] for entry in self.questions_by_id]
+        self.num_questions = min(self.num_questions, len(candidates))
+        return AdaptiveSelector(candidates, self.question_stats, self.rng)
+
     def run_quiz(self):
+        # The chart is only needed at the end, so load matplotlib while the quiz runs
+        preload_matplotlib()
         self.initialize_results_file()
         self.display_welcome()
+        # Every quiz is its own session, even if the same game is played again
+        self.session_id = uuid.uuid4().hex
+        self.log_event("start", name=self.name)
         
         self.num_questions = self.get_num_questions()
-        all_questions = []
         
-        for q_type, questions in self.questions_bank.items():
-            for question, answer_data in questions.items():
-                all_questions.append((q_type, question, answer_data))
-        
-        random.shuffle(all_questions)
-        selected_questions = all_questions[:self.num_questions]
-        
-        for q_type, question, answer_data in selected_questions:
-            if q_type == "multiple_choice":
-                if self.ask_multiple_choice(question, answer_data):
-                    self.score += 1
-            elif q_type == "true_false":
-                if self.ask_true_false(question, answer_data):
+        ask_methods = {
+            "multiple_choice": self.ask_multiple_choice,
+            "true_false": self.ask_true_false,
+            "numerical": self.ask_numerical,
+            "short_answer": self.ask_short_answer
+        }
+        if self.adaptive:
+            # Pick each question based on how the previous ones went
+            selector = self.make_selector()
+            for _ in range(self.num_questions):
+                q_type, question, answer_data = selector.next_question()
+                is_correct = ask_methods[q_type](question, answer_data)
+                selector.record(question, is_correct)
+                if is_correct:
                     self.score += 1
-            elif q_type == "numerical":
-                if self.ask_numerical(question, answer_data):
+        else:
+            for q_type, question, answer_data in self.select_questions():
+                if ask_methods[q_type](question, answer_data):
                     self.score += 1
 
         self.percentage = (self.score / self.num_questions) * 100
-        self.generate_summary()
         self.save_results()
+        # Draw the chart, including this result, while the summary is being read
+        self.start_results_chart()
+        self.generate_summary()
         self.plot_results_comparison()
 
 def main():
-    quiz = QuizGame()
-    quiz.run_quiz()
+    parser = argparse.ArgumentParser(description="Run the quiz.")
+    parser.add_argument('bank_file', nargs='?', type=Path, help="question bank file (see question_bank.py)")
+    parser.add_argument('--db', type=Path, help="save results to this SQLite database instead of the CSV file")
+    parser.add_argument('--adaptive', action='store_true', help="pick questions to suit the participant")
+    parser.add_argument('--window', action='store_true', help="show the whole quiz in one window")
+    parser.add_argument('--results', type=Path, help="save results to this CSV file instead of quiz_results_3.csv")
+    parser.add_argument('--log', type=Path, help="also append this session's events to a log (see session_log.py)")
+    args = parser.parse_args()
+
+    results = None
+    if args.db is not None:
+        from results_db import SqliteResults
+        results = SqliteResults(args.db)
+    elif args.results is not None:
+        results = CsvResults(args.results)
+    event_log = SessionLog(args.log) if args.log is not None else None
+    ui = None
+    if args.window:
+        from quiz_window import QuizWindow
+        ui = QuizWindow()
+    quiz = QuizGame(args.bank_file, results=results, ui=ui, adaptive=args.adaptive, event_log=event_log)
+    profiling = profiler_from_environment()
+    try:
+        quiz.run_quiz()
+    finally:
+        if profiling is not None:
+            profiler, profile_file = profiling
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+        # Also when the participant quits part way through
+        if quiz.timer is not None:
+            quiz.timer.export(quiz.name)
+        if ui is not None:
+            ui.close()
+        if event_log is not None:
+            event_log.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+# Single-window UI for the quiz program
+# easygui opens a new Tk window for every dialog. QuizWindow has the same
+# functions (msgbox, enterbox, integerbox, buttonbox, ynbox, textbox) but shows
+# them all in one window, reusing the same widgets and only changing their
+# contents, which is much quicker on slow lab PCs.
+#
+# Usage: QuizGame(ui=QuizWindow()), or python quiz_version_3.py --window
+
+# Import necessary modules
+import tkinter as tk
+
+class QuizWindow:
+    def __init__(self, title="Quiz Game"):
+        self.root = tk.Tk()
+        self.root.title(title)
+        self.root.minsize(500, 250)
+        self.root.protocol("WM_DELETE_WINDOW", self._cancel)
+
+        self.result = tk.StringVar(self.root)
+        self._cancelled = False
+        self._image = None
+
+        # Every widget is created once; each dialog only changes their contents
+        self.title_label = tk.Label(self.root, font=("TkDefaultFont", 14, "bold"))
+        self.message_label = tk.Label(self.root, wraplength=600, justify="left")
+        self.image_label = tk.Label(self.root)
+        self.entry = tk.Entry(self.root, width=40)
+        self.error_label = tk.Label(self.root, fg="red")
+        self.text_frame = tk.Frame(self.root)
+        self.text = tk.Text(self.text_frame, wrap="word", height=20, width=80)
+        scrollbar = tk.Scrollbar(self.text_frame, command=self.text.yview)
+        self.text.configure(yscrollcommand=scrollbar.set)
+        self.text.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.button_frame = tk.Frame(self.root)
+        self.buttons = []
+
+        self.entry.bind("<Return>", lambda event: self._choose(self.entry.get()))
+
+    def _cancel(self):
+        self._cancelled = True
+        self.result.set("")
+
+    def _choose(self, value):
+        self.result.set(value)
+
+    def _show(self, msg, title, choices, entry=False, text=None, image=None, error=""):
+        """Fill in the window and wait for a button (or Enter). Returns None if closed or cancelled."""
+        for widget in (self.title_label, self.message_label, self.image_label, self.entry,
+                       self.error_label, self.text_frame, self.button_frame):
+            widget.pack_forget()
+
+        self.title_label.configure(text=title)
+        self.title_label.pack(pady=(10, 5))
+        self.message_label.configure(text=msg)
+        self.message_label.pack(padx=20, pady=5)
+
+        if image is not None:
+            self._image = tk.PhotoImage(file=image)
+            self.image_label.configure(image=self._image)
+            self.image_label.pack(padx=10, pady=5)
+        if text is not None:
+            self.text.configure(state="normal")
+            self.text.delete("1.0", "end")
+            self.text.insert("1.0", text)
+            self.text.configure(state="disabled")
+            self.text_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        if entry:
+            self.entry.pack(pady=5)
+            self.entry.focus_set()
+        if error:
+            self.error_label.configure(text=error)
+            self.error_label.pack()
+
+        # Reuse the existing buttons and only make new ones when more are needed
+        while len(self.buttons) < len(choices):
+            self.buttons.append(tk.Button(self.button_frame, width=18))
+        for button in self.buttons:
+            button.pack_forget()
+        for button, choice in zip(self.buttons, choices):
+            if entry and choice == "OK":
+                command = lambda: self._choose(self.entry.get())
+            elif entry and choice == "Cancel":
+                # Cancelling is recorded separately, so typing "Cancel" is still an answer
+                command = self._cancel
+            else:
+                command = lambda choice=choice: self._choose(choice)
+            button.configure(text=choice, command=command)
+            button.pack(side="left", padx=5, pady=10)
+        self.button_frame.pack()
+
+        self._cancelled = False
+        self.result.set("")
+        self.root.wait_variable(self.result)
+        if image is not None:
+            self._image = None
+        return None if self._cancelled else self.result.get()
+
+    def msgbox(self, msg="", title="", ok_button="OK", image=None):
+        return self._show(msg, title, [ok_button], image=image)
+
+    def buttonbox(self, msg="", title="", choices=("OK",), image=None):
+        return self._show(msg, title, list(choices), image=image)
+
+    def ynbox(self, msg="", title="", choices=("Yes", "No")):
+        return self._show(msg, title, list(choices)) == choices[0]
+
+    def enterbox(self, msg="", title="", default=""):
+        self.entry.delete(0, "end")
+        self.entry.insert(0, default)
+        return self._show(msg, title, ["OK", "Cancel"], entry=True)
+
+    def integerbox(self, msg="", title="", default=None, lowerbound=0, upperbound=99):
+        self.entry.delete(0, "end")
+        if default is not None:
+            self.entry.insert(0, str(default))
+        error = ""
+        while True:
+            answer = self._show(msg, title, ["OK", "Cancel"], entry=True, error=error)
+            if answer is None:
+                return None
+            try:
+                number = int(answer)
+            except ValueError:
+                error = "Please enter a whole number."
+                continue
+            if lowerbound <= number <= upperbound:
+                return number
+            error = f"Please enter a number from {lowerbound} to {upperbound}."
+
+    def textbox(self, msg="", title="", text=""):
+        self._show(msg, title, ["OK"], text=text)
+        return text
+
+    def close(self):
+        self.root.destroy()
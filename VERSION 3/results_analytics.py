@@ -0,0 +1,160 @@
+# Results analytics for the quiz program
+# Reads a results CSV from any version in chunks into NumPy arrays and keeps only
+# running totals, so memory stays bounded however long the history is. Scores
+# are kept as counts of each distinct percentage, which is small because
+# percentages only come from score/questions combinations, so the median and
+# percentiles are still exact.
+#
+# Usage: python results_analytics.py quiz_results_3.csv [--name Cayden] [--top 10]
+
+# Import necessary modules
+import argparse
+import csv
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+# Rows read into NumPy at a time
+CHUNK_SIZE = 100_000
+
+class ResultsAnalytics:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        # Distinct percentages and how many results had each one
+        self.values = np.empty(0)
+        self.value_counts = np.empty(0, dtype=np.int64)
+        # name key -> [display name, attempts, total percentage, best percentage]
+        self.participants = {}
+        # "YYYY-MM-DD" -> number of results
+        self.day_counts = {}
+
+    @classmethod
+    def from_csv(cls, path, chunk_size=CHUNK_SIZE):
+        """Read a results file from any version of the quiz, chunk_size rows at a time."""
+        analytics = cls()
+        with open(path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return analytics
+            name_col = header.index('Name')
+            percentage_col = header.index('Percentage')
+            date_col = header.index('Date') if 'Date' in header else None
+
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                names = np.array([row[name_col] for row in rows])
+                percentages = np.array([row[percentage_col] for row in rows], dtype=float)
+                dates = np.array([row[date_col][:10] for row in rows]) if date_col is not None else None
+                analytics.add_chunk(names, percentages, dates)
+        return analytics
+
+    def add_chunk(self, names, percentages, dates=None):
+        self.count += len(percentages)
+        self.total += float(percentages.sum())
+
+        # Merge this chunk's percentage counts into the running counts
+        chunk_values, chunk_counts = np.unique(percentages, return_counts=True)
+        all_values = np.concatenate([self.values, chunk_values])
+        all_counts = np.concatenate([self.value_counts, chunk_counts])
+        self.values, inverse = np.unique(all_values, return_inverse=True)
+        self.value_counts = np.bincount(inverse, weights=all_counts).astype(np.int64)
+
+        # Group the chunk by participant (ignoring case) before touching the dict
+        keys = np.char.lower(np.char.strip(names))
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        attempts = np.bincount(inverse, minlength=len(unique_keys))
+        totals = np.bincount(inverse, weights=percentages, minlength=len(unique_keys))
+        bests = np.full(len(unique_keys), -np.inf)
+        np.maximum.at(bests, inverse, percentages)
+        for i, key in enumerate(unique_keys.tolist()):
+            entry = self.participants.setdefault(key, [str(names[first[i]]), 0, 0.0, -np.inf])
+            entry[1] += int(attempts[i])
+            entry[2] += float(totals[i])
+            entry[3] = max(entry[3], float(bests[i]))
+
+        if dates is not None:
+            days, day_counts = np.unique(dates, return_counts=True)
+            for day, n in zip(days.tolist(), day_counts.tolist()):
+                if day:
+                    self.day_counts[day] = self.day_counts.get(day, 0) + n
+
+    def mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+    def quantile(self, q):
+        """Exact quantile (0-1) with the same linear interpolation as np.quantile."""
+        if not self.count:
+            return float('nan')
+        cumulative = np.cumsum(self.value_counts)
+        position = q * (self.count - 1)
+        lower = self.values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = self.values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        return float(lower + (upper - lower) * (position - np.floor(position)))
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def percentiles(self, points=(10, 25, 50, 75, 90)):
+        return {p: self.quantile(p / 100) for p in points}
+
+    def percentile_rank(self, percentage):
+        """Percentage of results below the given score (counting ties as half)."""
+        if not self.count:
+            return float('nan')
+        below = self.value_counts[self.values < percentage].sum()
+        equal = self.value_counts[self.values == percentage].sum()
+        return float((below + 0.5 * equal) / self.count * 100)
+
+    def participant(self, name):
+        """(display name, attempts, average, best) for one participant, or None."""
+        entry = self.participants.get(name.strip().lower())
+        if entry is None:
+            return None
+        display_name, attempts, total, best = entry
+        return display_name, attempts, total / attempts, best
+
+    def top_participants(self, top=10):
+        ranked = sorted(self.participants.values(), key=lambda entry: entry[3], reverse=True)[:top]
+        return [(name, attempts, total / attempts, best) for name, attempts, total, best in ranked]
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a quiz results file.")
+    parser.add_argument('results_file', type=Path, help="results CSV from any version of the quiz")
+    parser.add_argument('--name', help="also show this participant's history and rank")
+    parser.add_argument('--top', type=int, default=10, help="number of participants to list")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    analytics = ResultsAnalytics.from_csv(args.results_file, args.chunk_size)
+    print(f"Results: {analytics.count}")
+    if not analytics.count:
+        return
+    print(f"Mean: {analytics.mean():.1f}%   Median: {analytics.median():.1f}%")
+    print("Percentiles: " + "   ".join(f"p{p}: {v:.1f}%" for p, v in analytics.percentiles().items()))
+
+    print(f"\nTop {args.top} participants (best / average / attempts):")
+    for name, attempts, average, best in analytics.top_participants(args.top):
+        print(f"  {name}: {best:.1f}% / {average:.1f}% / {attempts}")
+
+    if analytics.day_counts:
+        print("\nResults per day:")
+        for day, n in sorted(analytics.day_counts.items()):
+            print(f"  {day}: {n}")
+
+    if args.name:
+        found = analytics.participant(args.name)
+        if found is None:
+            print(f"\nNo results for {args.name}.")
+        else:
+            name, attempts, average, best = found
+            rank = analytics.percentile_rank(best)
+            print(f"\n{name}: best {best:.1f}%, average {average:.1f}% over {attempts} attempts, "
+                  f"better than {rank:.1f}% of results")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# Results chart for the quiz program
+# Instead of one bar per result, the chart shows the score distribution (with the
+# average and the middle 50% of scores) and the top participants, so it looks the
+# same with 10 results or 10 million. The chart is drawn in a background thread
+# while the participant reads their summary, from a snapshot of the results
+# taken after their result is saved. The drawn figure is cached on disk, so the
+# next session only has to change the bar sizes and labels before adding its
+# own marker. matplotlib is only imported when it is needed (or preloaded in the
+# background), so it doesn't slow down the first dialog.
+
+# Import necessary modules
+import pickle
+import threading
+
+# Number of participants shown in the top scores panel
+TOP_PARTICIPANTS = 10
+
+def preload_matplotlib():
+    """Import matplotlib in a background thread while the quiz is running."""
+    thread = threading.Thread(target=_import_matplotlib, name="preload-matplotlib", daemon=True)
+    thread.start()
+    return thread
+
+def _import_matplotlib():
+    import matplotlib.figure
+    import matplotlib.backends.backend_agg
+
+def histogram_quantile(counts, q):
+    """Estimate a quantile (0-1) from the 10 score bins by interpolating inside the bin."""
+    total = sum(counts)
+    target = q * total
+    seen = 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= target:
+            return (i + (target - seen) / n) * 10
+        seen += n
+    return 100.0
+
+def results_snapshot(results):
+    """The numbers the chart shows, read together so they match each other."""
+    return {
+        "path": str(results.path),
+        "count": results.count(),
+        "average": results.average(),
+        "histogram": results.histogram(),
+        "best_scores": results.best_scores(TOP_PARTICIPANTS)
+    }
+
+def build_figure(snapshot):
+    """Draw the parts of the chart that only depend on the saved results."""
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Rectangle
+
+    fig = Figure(figsize=(12, 6))
+    dist_ax, top_ax = fig.subplots(1, 2, gridspec_kw={'width_ratios': [3, 2]})
+
+    # Everything is drawn empty and then filled in by update_figure
+    dist_ax.bar([i * 10 + 5 for i in range(10)], [0] * 10, width=9, color='tab:blue')
+    dist_ax.add_patch(Rectangle((0, 0), 0, 1, transform=dist_ax.get_xaxis_transform(),
+                                color='orange', alpha=0.2, label='Middle 50%'))
+    dist_ax.axvline(0, color='r', linestyle='--', label='Average Score')
+    dist_ax.set_xlim(0, 100)
+    dist_ax.set_xlabel('Score (%)')
+    dist_ax.set_ylabel('Number of results')
+
+    top_ax.barh(range(TOP_PARTICIPANTS), [0] * TOP_PARTICIPANTS, color='tab:blue')
+    top_ax.set_xlim(0, 100)
+    top_ax.set_xlabel('Best score (%)')
+
+    update_figure(fig, snapshot)
+    return fig
+
+def update_figure(fig, snapshot):
+    """Show a snapshot in a figure from build_figure, which is much quicker than drawing a new one."""
+    dist_ax, top_ax = fig.axes
+    counts = snapshot["histogram"]
+    bars, span, average = dist_ax.patches[:10], dist_ax.patches[10], dist_ax.lines[0]
+
+    for bar, n in zip(bars, counts):
+        bar.set_height(n)
+    dist_ax.set_ylim(0, max(max(counts), 1) * 1.05)
+    low, high = histogram_quantile(counts, 0.25), histogram_quantile(counts, 0.75)
+    span.set_x(low)
+    span.set_width(high - low)
+    average.set_xdata([snapshot["average"]] * 2)
+    span.set_visible(snapshot["count"] > 0)
+    average.set_visible(snapshot["count"] > 0)
+    dist_ax.set_title(f'Quiz Results Comparison ({snapshot["count"]} results)')
+
+    best_scores = snapshot["best_scores"]
+    for i, bar in enumerate(top_ax.patches):
+        bar.set_width(best_scores[i][1] if i < len(best_scores) else 0)
+    names = [name for name, best in best_scores]
+    top_ax.set_yticks(range(len(names)), names)
+    # Only show the bars in use, highest first
+    top_ax.set_ylim(max(len(names), 1) - 0.5, -0.5)
+    top_ax.set_title(f'Top {len(names)} Participants')
+
+class ChartRenderer:
+    """Prepares the results chart in a background thread."""
+
+    def __init__(self, snapshot, cache_file):
+        self.snapshot = snapshot
+        self.cache_file = cache_file
+        self.figure = None
+        # Anything that goes wrong in the thread, raised again by finish()
+        self.error = None
+        self._thread = threading.Thread(target=self._prepare, name="results-chart", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _prepare(self):
+        try:
+            self._draw()
+        except Exception as error:
+            self.error = error
+
+    def _draw(self):
+        # Results are only ever added, so the count works as a version number
+        key = (self.snapshot["path"], self.snapshot["count"])
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached_key, figure = pickle.load(f)
+            if cached_key == key:
+                self.figure = figure
+                return
+            update_figure(figure, self.snapshot)
+        except Exception:
+            # No cache, or one that can't be used (e.g. damaged or from another matplotlib version)
+            figure = build_figure(self.snapshot)
+        self.figure = figure
+
+        try:
+            temp_file = self.cache_file.with_suffix('.tmp')
+            with open(temp_file, 'wb') as f:
+                pickle.dump((key, figure), f)
+            temp_file.replace(self.cache_file)
+        except (OSError, pickle.PicklingError):
+            # The chart is still drawn, it just isn't cached for next time
+            pass
+
+    def finish(self, name, percentage, image_file):
+        """Wait for the chart, add the participant's marker and save it as an image."""
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        dist_ax, top_ax = self.figure.axes
+
+        dist_ax.axvline(percentage, color='green', linewidth=3, label=f'{name} ({percentage:.1f}%)')
+        dist_ax.legend()
+        for label, bar in zip(top_ax.get_yticklabels(), top_ax.patches):
+            if label.get_text().casefold() == name.casefold():
+                bar.set_color('green')
+
+        self.figure.tight_layout()
+        self.figure.savefig(image_file)
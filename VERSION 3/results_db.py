@@ -0,0 +1,239 @@
+# SQLite results storage for the quiz program
+# Stores results in a local database with indexes on name and date, so the
+# comparison graph, averages and leaderboards are queries instead of reading a
+# whole CSV file. It can also import the results CSV files of all three versions.
+#
+# Usage: python results_db.py migrate [--db quiz_results.db] [csv files...]
+#        python results_db.py leaderboard [--db quiz_results.db] [--top 10]
+
+# Import necessary modules
+import argparse
+import csv
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from results_maintenance import month_of, normalize_row, segment_rows
+
+# Define script directory and default database file
+script_dir = Path(__file__).parent
+database_file = script_dir / 'quiz_results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    percentage REAL NOT NULL,
+    questions_attempted INTEGER,
+    date TEXT,
+    version INTEGER
+);
+CREATE INDEX IF NOT EXISTS results_by_name ON results (name_key, percentage);
+CREATE INDEX IF NOT EXISTS results_by_date ON results (date);
+
+-- Running totals kept up to date by a trigger, so the average is never a full scan
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    total REAL NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0.0);
+CREATE TRIGGER IF NOT EXISTS results_totals AFTER INSERT ON results BEGIN
+    UPDATE totals SET count = count + 1, total = total + NEW.percentage WHERE id = 0;
+END;
+
+-- Number of results in each 10% band (100% goes in the last one), for the chart
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO bands VALUES (0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0), (8, 0), (9, 0);
+CREATE TRIGGER IF NOT EXISTS results_bands AFTER INSERT ON results BEGIN
+    UPDATE bands SET count = count + 1 WHERE band = MIN(CAST(NEW.percentage / 10 AS INTEGER), 9);
+END;
+
+-- Each participant's best score and number of attempts, for the leaderboard and ranks
+CREATE TABLE IF NOT EXISTS participants (
+    name_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    best REAL NOT NULL,
+    attempts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS participants_by_best ON participants (best);
+CREATE TRIGGER IF NOT EXISTS results_participants AFTER INSERT ON results BEGIN
+    INSERT INTO participants VALUES (NEW.name_key, NEW.name, NEW.percentage, 1)
+    ON CONFLICT (name_key) DO UPDATE SET name = MIN(name, excluded.name),
+        best = MAX(best, excluded.best), attempts = attempts + 1;
+END;
+
+-- Quiz sessions replayed from session logs (see session_log.py), so none is saved twice
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY
+);
+
+-- How many rows of each month of each CSV file have been imported already. Rows
+-- are counted per month because results_maintenance.py rotate moves a month's
+-- rows into a segment file, but never changes their order.
+CREATE TABLE IF NOT EXISTS imported_months (
+    path TEXT NOT NULL,
+    month TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    PRIMARY KEY (path, month)
+);
+"""
+
+def name_key(name):
+    """Names are matched without case, since the results mix "cayden" and "Cayden"."""
+    return name.strip().casefold()
+
+class SqliteResults:
+    """Results backend that stores rows in SQLite (same interface as CsvResults)."""
+
+    def __init__(self, path=database_file, version=3):
+        self.path = path
+        self.version = version
+        # The connection may be used from the background ResultsWriter thread
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def add_rows(self, rows, version=None):
+        """Insert [name, score, percentage, questions_attempted, date] rows in one transaction."""
+        with self._lock, self.conn:
+            self._insert(rows, version)
+
+    def add_session_rows(self, sessions):
+        """Insert the rows of (session id, row) pairs whose session isn't saved yet. Returns rows saved."""
+        with self._lock, self.conn:
+            rows = [row for session_id, row in sessions
+                    if self.conn.execute("INSERT OR IGNORE INTO sessions VALUES (?)", (session_id,)).rowcount]
+            self._insert(rows)
+        return len(rows)
+
+    def _insert(self, rows, version=None):
+        version = self.version if version is None else version
+        self.conn.executemany(
+            "INSERT INTO results (name, name_key, score, percentage, questions_attempted, date, version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((name, name_key(name), score, percentage, attempted, date, version)
+             for name, score, percentage, attempted, date in rows)
+        )
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def count(self):
+        return self._query("SELECT count FROM totals")[0][0]
+
+    def average(self):
+        count, total = self._query("SELECT count, total FROM totals")[0]
+        return total / count if count else 0.0
+
+    def recent(self, n):
+        """The last n results as (name, percentage, date), oldest first."""
+        rows = self._query("SELECT name, percentage, date FROM results ORDER BY id DESC LIMIT ?", (n,))
+        return rows[::-1]
+
+    def best(self, name):
+        rows = self._query("SELECT best FROM participants WHERE name_key = ?", (name_key(name),))
+        return rows[0][0] if rows else None
+
+    def rank(self, name):
+        """The participant's place by best percentage (1 is first), or None."""
+        best = self.best(name)
+        if best is None:
+            return None
+        return 1 + self._query("SELECT COUNT(*) FROM participants WHERE best > ?", (best,))[0][0]
+
+    def history(self, name):
+        return self._query("SELECT score, percentage, questions_attempted, date FROM results "
+                           "WHERE name_key = ? ORDER BY id", (name_key(name),))
+
+    def between(self, start, end):
+        """Results with a date from start up to (not including) end, e.g. "2025-04-01"."""
+        return self._query("SELECT name, score, percentage, questions_attempted, date FROM results "
+                           "WHERE date >= ? AND date < ? ORDER BY date", (start, end))
+
+    def histogram(self):
+        """Number of results in each 10% score band (100% goes in the last one)."""
+        return [n for (n,) in self._query("SELECT count FROM bands ORDER BY band")]
+
+    def best_scores(self, top):
+        """The top participants as (name, best percentage), highest first."""
+        return [(name, best) for name, best, attempts in self.leaderboard(top)]
+
+    def names(self):
+        """Every participant's name, one spelling each."""
+        return [name for (name,) in self._query("SELECT name FROM participants ORDER BY name_key")]
+
+    def leaderboard(self, top=10):
+        """Each participant's best percentage, highest first."""
+        return self._query("SELECT name, best, attempts FROM participants ORDER BY best DESC LIMIT ?", (top,))
+
+    def import_csv(self, csv_path, version=None):
+        """Import the rows of a results CSV from any version, and of its rotated
+        segments, that haven't been imported yet."""
+        csv_path = Path(csv_path).resolve()
+        if version is None:
+            match = re.search(r'VERSION (\d+)', str(csv_path))
+            version = int(match.group(1)) if match else None
+
+        path = str(csv_path)
+        seen = {}
+        imported = 0
+
+        def all_rows():
+            # Every row in order: the rotated segments (oldest month first, one month at a
+            # time), then the file itself one row at a time
+            for month, segment in segment_rows(csv_path):
+                yield from segment
+            with open(csv_path, 'r', newline='') as f:
+                for row in csv.DictReader(f):
+                    yield normalize_row(row)
+
+        def new_rows(done):
+            nonlocal imported
+            for row in all_rows():
+                month = month_of(row)
+                seen[month] = seen.get(month, 0) + 1
+                if seen[month] > done.get(month, 0):
+                    imported += 1
+                    yield row[:4] + [row[4] or None]
+
+        # One transaction, so a failed import can't leave rows saved but not marked as imported
+        with self._lock, self.conn:
+            done = dict(self.conn.execute("SELECT month, rows FROM imported_months WHERE path = ?", (path,)))
+            self._insert(new_rows(done), version)
+            self.conn.executemany("INSERT OR REPLACE INTO imported_months VALUES (?, ?, ?)",
+                                  [(path, month, max(n, done.get(month, 0))) for month, n in seen.items()])
+        return imported
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Store quiz results in SQLite.")
+    parser.add_argument('command', choices=['migrate', 'leaderboard'])
+    parser.add_argument('files', nargs='*', type=Path, help="results CSV files (default: every version's)")
+    parser.add_argument('--db', type=Path, default=database_file)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    results = SqliteResults(args.db)
+    if args.command == 'migrate':
+        files = args.files or sorted(script_dir.parent.glob('VERSION */quiz_results*.csv'))
+        for csv_path in files:
+            print(f"{csv_path}: imported {results.import_csv(csv_path)} new rows")
+    else:
+        print(f"{results.count()} results, average {results.average():.1f}%\n")
+        for place, (name, best, attempts) in enumerate(results.leaderboard(args.top), 1):
+            print(f"{place}. {name} - {best:.1f}% ({attempts} attempts)")
+    results.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# Results file maintenance for the quiz program
+# Keeps results files from growing forever:
+#   rotate  - moves results from earlier months out of a version 3 results file
+#             into one segment per month (versions 1 and 2 work out their totals
+#             from their results file alone, so their files are never rotated)
+#   compact - turns older monthly segments into compressed column files with a
+#             summary footer (count, total, histogram, best score per name)
+#   summary - prints totals using only the footers plus the recent rows
+#
+# Usage: python results_maintenance.py rotate|compact|summary <results csv> [--keep-months 1]
+
+# Import necessary modules
+import argparse
+import csv
+import json
+import os
+import struct
+import zlib
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+from results_writer import open_locked, unlock_file
+
+# Every segment uses the version 3 columns
+HEADER = ['Name', 'Score', 'Percentage', 'Questions_Attempted', 'Date']
+SEGMENT_MAGIC = b'QUIZSEG1'
+UNDATED = 'undated'
+
+def segments_dir(results_path):
+    return results_path.with_name(results_path.stem + '_segments')
+
+def normalize_row(row):
+    """Turn a row from any version's results file into [name, score, percentage, attempted, date]."""
+    score = int(row['Score'])
+    percentage = float(row['Percentage'])
+    attempted = row.get('Questions_Attempted')
+    if attempted:
+        attempted = int(attempted)
+    elif percentage:
+        # Versions 1 and 2 don't save the number of questions, so work it out
+        attempted = round(score * 100 / percentage)
+    else:
+        attempted = None
+    return [row['Name'], score, percentage, attempted, row.get('Date') or '']
+
+def month_of(row):
+    return row[4][:7] if row[4] else UNDATED
+
+def rotate(results_path):
+    """Move rows from before this month into monthly segment files. Returns rows moved.
+
+    Raises ValueError for a results file that doesn't have the version 3 columns.
+    """
+    this_month = datetime.now().strftime("%Y-%m")
+    folder = segments_dir(results_path)
+
+    # Hold the lock until the new file is in place so no result is added in between
+    with open_locked(results_path, 'r+') as f:
+        try:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header != HEADER:
+                raise ValueError(f"{results_path} isn't a version 3 results file; only version 3 reads "
+                                 "rotated results back")
+            by_month = {}
+            kept = []
+            for values in reader:
+                if not values:
+                    continue
+                row = normalize_row(dict(zip(header, values)))
+                if month_of(row) == this_month:
+                    kept.append(values)
+                else:
+                    by_month.setdefault(month_of(row), []).append(row)
+            if not by_month:
+                return 0
+
+            # A crash after this can only leave rows in both places, never lose them
+            folder.mkdir(exist_ok=True)
+            for month, rows in by_month.items():
+                segment = folder / f'{month}.csv'
+                new_file = not segment.exists()
+                with open(segment, 'a', newline='') as out:
+                    writer = csv.writer(out)
+                    if new_file:
+                        writer.writerow(HEADER)
+                    writer.writerows(rows)
+                    out.flush()
+                    os.fsync(out.fileno())
+
+            # Write this month's rows, in the file's own columns, to a new file and swap it in
+            temp_file = results_path.with_suffix('.tmp')
+            with open(temp_file, 'w', newline='') as out:
+                writer = csv.writer(out)
+                writer.writerow(header)
+                writer.writerows(kept)
+                out.flush()
+                os.fsync(out.fileno())
+            temp_file.replace(results_path)
+        finally:
+            unlock_file(f)
+    return sum(len(rows) for rows in by_month.values())
+
+def summarize_rows(rows):
+    """The footer summary for a list of normalized rows."""
+    histogram = [0] * 10
+    best = {}
+    for name, score, percentage, attempted, date in rows:
+        histogram[min(int(percentage // 10), 9)] += 1
+        if percentage > best.get(name, -1):
+            best[name] = percentage
+    dates = [row[4] for row in rows if row[4]]
+    return {
+        "count": len(rows),
+        "total": sum(row[2] for row in rows),
+        "histogram": histogram,
+        "best": best,
+        "first_date": min(dates) if dates else None,
+        "last_date": max(dates) if dates else None
+    }
+
+def write_segment(path, rows):
+    """Write rows as separately compressed columns followed by a JSON footer."""
+    columns = {
+        "name": '\n'.join(row[0] for row in rows).encode('utf-8'),
+        "score": array('i', [row[1] for row in rows]).tobytes(),
+        "percentage": array('d', [row[2] for row in rows]).tobytes(),
+        "attempted": array('i', [-1 if row[3] is None else row[3] for row in rows]).tobytes(),
+        "date": '\n'.join(row[4] for row in rows).encode('utf-8')
+    }
+    footer = summarize_rows(rows)
+    footer["columns"] = {}
+    with open(path, 'wb') as f:
+        f.write(SEGMENT_MAGIC)
+        for name, data in columns.items():
+            compressed = zlib.compress(data, 9)
+            footer["columns"][name] = [f.tell(), len(compressed)]
+            f.write(compressed)
+        footer_bytes = json.dumps(footer).encode('utf-8')
+        f.write(footer_bytes)
+        f.write(struct.pack('<Q', len(footer_bytes)))
+
+def read_footer(path):
+    """Read only the summary footer at the end of a segment file."""
+    with open(path, 'rb') as f:
+        f.seek(-8, 2)
+        (length,) = struct.unpack('<Q', f.read(8))
+        f.seek(-8 - length, 2)
+        return json.loads(f.read(length))
+
+def read_segment(path):
+    """Read all rows back from a segment file."""
+    footer = read_footer(path)
+    columns = {}
+    with open(path, 'rb') as f:
+        for name, (offset, length) in footer["columns"].items():
+            f.seek(offset)
+            columns[name] = zlib.decompress(f.read(length))
+    count = footer["count"]
+    if not count:
+        return []
+    names = columns["name"].decode('utf-8').split('\n')
+    dates = columns["date"].decode('utf-8').split('\n')
+    scores, percentages, attempted = array('i'), array('d'), array('i')
+    scores.frombytes(columns["score"])
+    percentages.frombytes(columns["percentage"])
+    attempted.frombytes(columns["attempted"])
+    return [[names[i], scores[i], percentages[i], None if attempted[i] < 0 else attempted[i], dates[i]]
+            for i in range(count)]
+
+def read_csv_segment(path):
+    with open(path, 'r', newline='') as f:
+        return [normalize_row(row) for row in csv.DictReader(f)]
+
+def compact(results_path, keep_months=1):
+    """Convert monthly CSV segments older than the newest keep_months into column files."""
+    folder = segments_dir(results_path)
+    if not folder.exists():
+        return []
+    months = sorted(p.stem for p in folder.glob('*.csv') if p.stem != UNDATED)
+    old = [folder / f'{month}.csv' for month in months[:max(len(months) - keep_months, 0)]]
+    if (folder / f'{UNDATED}.csv').exists():
+        old.append(folder / f'{UNDATED}.csv')
+
+    compacted = []
+    for csv_segment in old:
+        segment = csv_segment.with_suffix('.seg')
+        rows = read_csv_segment(csv_segment)
+        if segment.exists():
+            # Rows for this month were rotated again after it was compacted
+            rows = read_segment(segment) + rows
+        temp_file = segment.with_suffix('.tmp')
+        write_segment(temp_file, rows)
+        temp_file.replace(segment)
+        csv_segment.unlink()
+        compacted.append(segment)
+    return compacted
+
+def segment_rows(results_path):
+    """(month, rows) for every rotated segment, oldest month first (undated last)."""
+    folder = segments_dir(results_path)
+    if not folder.exists():
+        return
+    months = sorted({p.stem for p in folder.glob('*.csv')} | {p.stem for p in folder.glob('*.seg')},
+                    key=lambda month: (month == UNDATED, month))
+    for month in months:
+        # Same order as compact(): the compacted rows came first
+        rows = []
+        if (folder / f'{month}.seg').exists():
+            rows += read_segment(folder / f'{month}.seg')
+        if (folder / f'{month}.csv').exists():
+            rows += read_csv_segment(folder / f'{month}.csv')
+        yield month, rows
+
+def segment_summaries(results_path):
+    """Footer summaries for every rotated segment (CSV segments are summarized by reading them)."""
+    folder = segments_dir(results_path)
+    if not folder.exists():
+        return []
+    summaries = [read_footer(p) for p in sorted(folder.glob('*.seg'))]
+    summaries += [summarize_rows(read_csv_segment(p)) for p in sorted(folder.glob('*.csv'))]
+    return summaries
+
+def main():
+    parser = argparse.ArgumentParser(description="Rotate and compact a quiz results file.")
+    parser.add_argument('command', choices=['rotate', 'compact', 'summary'])
+    parser.add_argument('results_file', type=Path)
+    parser.add_argument('--keep-months', type=int, default=1, help="monthly segments to leave as CSV")
+    args = parser.parse_args()
+
+    if args.command == 'rotate':
+        try:
+            moved = rotate(args.results_file)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"Moved {moved} results into {segments_dir(args.results_file)}")
+    elif args.command == 'compact':
+        for segment in compact(args.results_file, args.keep_months):
+            print(f"Compacted {segment}")
+    else:
+        count, total = 0, 0.0
+        for summary in segment_summaries(args.results_file):
+            count += summary["count"]
+            total += summary["total"]
+        recent = read_csv_segment(args.results_file)
+        count += len(recent)
+        total += sum(row[2] for row in recent)
+        print(f"{count} results ({len(recent)} in the current file), "
+              f"average {total / count if count else 0:.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# Running results totals for the quiz program
+# Keeps the count, total, every participant's best score, the last few results
+# and the number of scores in each 10% band in a small SQLite file next to the
+# results CSV. Saving a result only updates a few rows of it, and the comparison
+# chart reads from it, so neither ever re-reads the CSV however long it gets.
+# It is only updated while the CSV is locked, and remembers how much of the CSV
+# it has counted, so rows added some other way are caught up by reading just
+# the new end of the file.
+
+# Import necessary modules
+import csv
+import os
+import sqlite3
+import threading
+
+from results_db import name_key
+from results_maintenance import segment_summaries
+from results_writer import open_locked, tail_check, unlock_file
+
+# Number of most recent results kept
+RECENT_RESULTS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    -- Size, inode and last bytes (see results_writer.tail_check) of the CSV file the totals were worked out from
+    source_size INTEGER NOT NULL,
+    source_id INTEGER,
+    source_check BLOB
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0.0, -1, NULL, NULL);
+
+-- Names are matched without case, like everywhere else (see results_db.name_key)
+CREATE TABLE IF NOT EXISTS best (
+    name_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    best REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS best_by_score ON best (best);
+
+CREATE TABLE IF NOT EXISTS recent (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    percentage REAL NOT NULL,
+    date TEXT
+);
+
+-- Number of scores in each 10% band (100% goes in the last one)
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO bands VALUES (0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0), (8, 0), (9, 0);
+"""
+
+ADD_BEST = ("INSERT INTO best VALUES (?, ?, ?) ON CONFLICT (name_key) "
+            "DO UPDATE SET best = MAX(best, excluded.best)")
+
+def band_of(percentage):
+    return min(int(percentage // 10), 9)
+
+class ResultsStats:
+    """Running totals kept next to the results file so it never has to be re-read."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        # Results may be saved from the background ResultsWriter thread
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        # The totals can always be rebuilt from the CSV, so they don't need to survive a power cut
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Catch up with rows added while nothing was keeping the totals up to date
+        self.sync()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _add(self, rows):
+        """Add (name, percentage, date) rows; the caller holds the lock and the transaction."""
+        count = 0
+        total = 0.0
+        for name, percentage, date in rows:
+            count += 1
+            total += percentage
+            self.conn.execute(ADD_BEST, (name_key(name), name, percentage))
+            self.conn.execute("UPDATE bands SET count = count + 1 WHERE band = ?", (band_of(percentage),))
+            self.conn.execute("INSERT INTO recent (name, percentage, date) VALUES (?, ?, ?)", (name, percentage, date))
+        self.conn.execute("UPDATE totals SET count = count + ?, total = total + ?", (count, total))
+        self.conn.execute("DELETE FROM recent WHERE id <= (SELECT MAX(id) FROM recent) - ?", (RECENT_RESULTS,))
+
+    def add_rows(self, rows, start, end):
+        """Add [name, score, percentage, questions_attempted, date] rows just appended to the CSV.
+
+        start and end are the byte range the rows were written to. This must be
+        called while the CSV is still locked (see locked_append), so another
+        process can't add rows in between.
+        """
+        with self._lock, self.conn:
+            self._catch_up(end, start, [(name, percentage, date) for name, score, percentage, attempted, date in rows])
+
+    def sync(self):
+        """Add any rows that reached the CSV without going through add_rows."""
+        with open_locked(self.source, 'r') as f:
+            try:
+                end = f.seek(0, os.SEEK_END)
+                with self._lock, self.conn:
+                    self._catch_up(end)
+            finally:
+                unlock_file(f)
+
+    def rebuild(self):
+        """Recalculate the totals from the CSV file (only needed once)."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE totals SET source_size = -1")
+        self.sync()
+
+    def _catch_up(self, end, start=None, rows=()):
+        """Bring the totals up to byte end of the CSV; the caller holds both locks and the transaction."""
+        recorded, recorded_id, recorded_check = self.conn.execute(
+            "SELECT source_size, source_id, source_check FROM totals").fetchone()
+        with open(self.source, 'rb') as f:
+            source_id = os.fstat(f.fileno()).st_ino
+            if (recorded_id != source_id or not 0 < recorded <= end
+                    or tail_check(f, recorded) != recorded_check):
+                # A different or rewritten file (e.g. one swapped in by rotate), so start again from the beginning
+                self._reset()
+                recorded = 0
+            if recorded == start:
+                # Nothing else was added since the last update
+                self._add(rows)
+            elif recorded != end:
+                self._add(self._rows_between(f, recorded, end))
+            self.conn.execute("UPDATE totals SET source_size = ?, source_id = ?, source_check = ?",
+                              (end, source_id, tail_check(f, end)))
+
+    def _reset(self):
+        self.conn.execute("UPDATE totals SET count = 0, total = 0.0")
+        self.conn.execute("UPDATE bands SET count = 0")
+        self.conn.execute("DELETE FROM best")
+        self.conn.execute("DELETE FROM recent")
+
+        # Rotated results only need their segment summaries (see results_maintenance.py)
+        for summary in segment_summaries(self.source):
+            self.conn.execute("UPDATE totals SET count = count + ?, total = total + ?",
+                              (summary['count'], summary['total']))
+            for band, n in enumerate(summary['histogram']):
+                self.conn.execute("UPDATE bands SET count = count + ? WHERE band = ?", (n, band))
+            self.conn.executemany(ADD_BEST, [(name_key(name), name, best) for name, best in summary['best'].items()])
+
+    @staticmethod
+    def _rows_between(f, start, end):
+        """(name, percentage, date) for the CSV rows between two byte positions."""
+        f.seek(0)
+        header = next(csv.reader([f.readline().decode('utf-8')]), [])
+        f.seek(max(start, f.tell()))
+
+        def lines():
+            position = f.tell()
+            for line in f:
+                position += len(line)
+                if position > end:
+                    break
+                yield line.decode('utf-8')
+
+        for row in csv.DictReader(lines(), fieldnames=header):
+            yield row['Name'], float(row['Percentage']), row.get('Date') or ''
+
+    def count(self):
+        return self._query("SELECT count FROM totals")[0][0]
+
+    def average(self):
+        count, total = self._query("SELECT count, total FROM totals")[0]
+        return total / count if count else 0.0
+
+    def recent(self, n):
+        """The last n results as (name, percentage, date), oldest first."""
+        return self._query("SELECT name, percentage, date FROM recent ORDER BY id DESC LIMIT ?", (n,))[::-1]
+
+    def histogram(self):
+        """Number of results in each 10% score band."""
+        return [n for (n,) in self._query("SELECT count FROM bands ORDER BY band")]
+
+    def best_scores(self, top):
+        """The top participants as (name, best percentage), highest first."""
+        return self._query("SELECT name, best FROM best ORDER BY best DESC LIMIT ?", (top,))
+
+    def best(self, name):
+        """The participant's best percentage, or None if they have no results."""
+        rows = self._query("SELECT best FROM best WHERE name_key = ?", (name_key(name),))
+        return rows[0][0] if rows else None
+
+    def rank(self, name):
+        """The participant's place by best percentage (1 is first), or None."""
+        best = self.best(name)
+        if best is None:
+            return None
+        return 1 + self._query("SELECT COUNT(*) FROM best WHERE best > ?", (best,))[0][0]
+
+    def participants(self):
+        return self._query("SELECT COUNT(*) FROM best")[0][0]
+
+    def names(self):
+        """Every participant's name, one spelling each."""
+        return [name for (name,) in self._query("SELECT name FROM best ORDER BY name_key")]
+
+    def close(self):
+        self.conn.close()
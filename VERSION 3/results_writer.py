@@ -0,0 +1,184 @@
+# Results writer for the quiz program
+# Appends result rows to a CSV file while holding a file lock, so several
+# sessions (or processes) can't interleave rows or write the header twice.
+# ResultsWriter queues rows in memory and a background thread saves them in
+# batches, so busy servers open the file (or commit) once per batch instead of
+# once per row.
+
+# Import necessary modules
+import csv
+import os
+import queue
+import threading
+import time
+import traceback
+from hashlib import blake2b
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        # msvcrt locks a byte range from the current position, so always lock the first byte
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+def unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def open_locked(path, mode):
+    """Open and lock a results file, opening it again if it was replaced while waiting for the lock
+    (results_maintenance.py rotate swaps in a new file)."""
+    while True:
+        f = open(path, mode, newline='')
+        lock_file(f)
+        if os.path.exists(path) and os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+            return f
+        unlock_file(f)
+        f.close()
+
+# Bytes before a position that are checked to tell whether a file was rewritten
+CHECK_BYTES = 1024
+
+def tail_check(f, end):
+    """A digest of the bytes just before end in a binary file, or None if end doesn't end a row.
+
+    Files kept alongside a CSV store it with how far they have read, so a CSV
+    that was rewritten in place (same inode) isn't read on from the wrong place.
+    """
+    start = max(end - CHECK_BYTES, 0)
+    f.seek(start)
+    data = f.read(end - start)
+    if len(data) != end - start or not data.endswith(b'\n'):
+        return None
+    return blake2b(data, digest_size=16).digest()
+
+def locked_append(path, header, rows, fsync=False, appended=None):
+    """Append rows to a CSV file under a lock, writing the header first if the file is empty.
+
+    appended(start, end) is called with the byte range of the new rows before
+    the lock is released, so files kept alongside the CSV can be updated in step.
+    """
+    with open_locked(path, 'a') as f:
+        try:
+            writer = csv.writer(f)
+            if f.seek(0, os.SEEK_END) == 0:
+                writer.writerow(header)
+            f.flush()
+            start = f.tell()
+            writer.writerows(rows)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+            if appended is not None:
+                appended(start, f.tell())
+        finally:
+            unlock_file(f)
+
+class ResultsNotSaved(Exception):
+    pass
+
+class ResultsWriter:
+    """Saves result rows in batches from a background thread.
+
+    save_rows is called with a list of rows (e.g. QuizGame.save_result_rows)
+    once batch_size rows are waiting or flush_ms milliseconds after the first
+    waiting row, whichever comes first. write() blocks when max_queue rows are
+    waiting, unless block is False (then it raises queue.Full).
+
+    A batch that can't be saved is tried again up to retries times, and after
+    that its rows are added to the front of the next batch, so save_rows should
+    save all of the rows or none of them. flush() and close() raise
+    ResultsNotSaved while any rows are still unsaved.
+    """
+
+    def __init__(self, save_rows, batch_size=100, flush_ms=50, max_queue=10000, retries=3, retry_ms=100):
+        self.save_rows = save_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.retries = retries
+        self.retry_interval = retry_ms / 1000
+        self.queue = queue.Queue(maxsize=max_queue)
+        # Rows from batches that couldn't be saved, and the last error
+        self.failed = []
+        self.error = None
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, row, block=True):
+        self.queue.put(row, block)
+
+    def full(self):
+        return self.queue.full()
+
+    def flush(self):
+        """Wait until every row written so far is in the file."""
+        self.queue.join()
+        self._check()
+
+    def close(self):
+        self.queue.put(self._stop)
+        self._thread.join()
+        if self.failed:
+            # One last try, since the problem (e.g. a full disk) may have been fixed
+            self._save([])
+        self._check()
+
+    def _check(self):
+        if self.failed:
+            raise ResultsNotSaved(f"{len(self.failed)} results could not be saved") from self.error
+
+    def _save(self, batch):
+        rows = self.failed + batch
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.retry_interval * 2 ** (attempt - 1))
+            try:
+                self.save_rows(rows)
+            except Exception as error:
+                self.error = error
+                traceback.print_exc()
+            else:
+                self.failed = []
+                self.error = None
+                return
+        # Keep the rows for the next batch instead of losing them
+        self.failed = rows
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self.queue.get()
+            if first is self._stop:
+                self.queue.task_done()
+                break
+
+            # Collect more rows until the batch is full or the time is up
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if row is self._stop:
+                    stopping = True
+                    self.queue.task_done()
+                    break
+                batch.append(row)
+
+            try:
+                self._save(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
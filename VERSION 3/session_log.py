@@ -0,0 +1,146 @@
+# Session event log for the quiz program
+# Each quiz session appends its events (start, every answer, finish) with a
+# timestamp and the session id to a log file, one JSON object per line. The
+# finish event is written to disk before the result is saved anywhere else. Kiosks
+# that can't reach the central results store keep the log, and replay merges it
+# later: only finished sessions are saved, each session id is only ever saved
+# once (so replaying the same or overlapping logs twice adds nothing), and the
+# log is read one line at a time and saved in batches, so backlogs of any size
+# use the same small amount of memory.
+#
+# Usage: python session_log.py replay LOG... [--db quiz_results.db | --results quiz_results_3.csv]
+#                                            [--batch-size 500]
+
+# Import necessary modules
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from results_writer import lock_file, unlock_file
+
+# Number of finished sessions saved to the results store at a time
+BATCH_SIZE = 500
+
+class SessionLog:
+    """Appends session events to a log file, one JSON line each."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def write(self, session_id, event, sync=False, **fields):
+        """Append one event; sync waits until it is on disk (e.g. before saving the result)."""
+        record = {"session": session_id, "event": event, "time": datetime.now().isoformat(timespec='seconds')}
+        record.update(fields)
+        line = json.dumps(record) + '\n'
+        # Several quiz windows may share one log, so whole lines are written under a lock
+        lock_file(self.file)
+        try:
+            self.file.write(line)
+            self.file.flush()
+            if sync:
+                os.fsync(self.file.fileno())
+        finally:
+            unlock_file(self.file)
+
+    def close(self):
+        self.file.close()
+
+def finished_sessions(log_paths):
+    """Yield (session id, results row) for every finish event in the logs, in order."""
+    for path in log_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short when a kiosk lost power
+                    continue
+                if record.get("event") == "finish":
+                    yield record["session"], record["row"]
+
+class SessionLedger:
+    """Remembers which sessions have been saved to a results store without its own
+    record of them (e.g. CsvResults), in a small SQLite file next to the results.
+    A quiz that keeps a session log saves its result through here as well, so
+    replaying that log into the same results adds nothing.
+
+    If the program stops after a batch is saved but before it is recorded here,
+    that one batch is saved again by the next replay. SqliteResults records
+    sessions in the same transaction as the rows, so it never repeats any.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        path = results.path.with_name(results.path.stem + '_sessions.db')
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY)")
+
+    def add_session_rows(self, sessions):
+        """Save the rows of sessions that haven't been saved yet. Returns rows saved."""
+        with self.conn:
+            rows = []
+            for session_id, row in sessions:
+                if self.conn.execute("INSERT OR IGNORE INTO sessions VALUES (?)", (session_id,)).rowcount:
+                    rows.append(row)
+            # The sessions are only recorded if the rows were saved
+            self.results.add_rows(rows)
+        return len(rows)
+
+    def close(self):
+        self.conn.close()
+
+def replay(log_paths, results, batch_size=BATCH_SIZE):
+    """Merge the finished sessions in the logs into a results store.
+
+    Returns (sessions read, rows saved); the rest were already saved.
+    """
+    if hasattr(results, 'add_session_rows'):
+        store = results
+    else:
+        store = SessionLedger(results)
+
+    read = 0
+    saved = 0
+    batch = []
+    for session in finished_sessions(log_paths):
+        read += 1
+        batch.append(session)
+        if len(batch) >= batch_size:
+            saved += store.add_session_rows(batch)
+            batch = []
+    if batch:
+        saved += store.add_session_rows(batch)
+
+    if store is not results:
+        store.close()
+    return read, saved
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge quiz session logs into a results store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    replay_parser = subparsers.add_parser('replay', help="save the finished sessions in session logs")
+    replay_parser.add_argument('logs', nargs='+', type=Path)
+    target = replay_parser.add_mutually_exclusive_group()
+    target.add_argument('--db', type=Path, help="SQLite results database (see results_db.py)")
+    target.add_argument('--results', type=Path, help="results CSV file (the default is quiz_results_3.csv)")
+    replay_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.db is not None:
+        from results_db import SqliteResults
+        results = SqliteResults(args.db)
+    else:
+        from quiz_version_3 import CsvResults, results_file
+        results = CsvResults(args.results or results_file)
+
+    read, saved = replay(args.logs, results, args.batch_size)
+    print(f"{read} finished sessions read, {saved} saved, {read - saved} already saved.")
+    if hasattr(results, 'close'):
+        results.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Startup benchmark for the quiz program
+# Measures the time from starting each version's script to its first prompt
+# (the first input() call or easygui dialog). The prompt is replaced with one
+# that records the time and exits, so no one needs to click anything.
+#
+# Usage: python benchmark_startup.py [--runs 10]
+
+# Import necessary modules
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Define the script directory and the scripts to measure
+script_dir = Path(__file__).parent
+SCRIPTS = {
+    "Version 1": script_dir / 'VERSION 1' / 'quiz_version_1.py',
+    "Version 2": script_dir / 'VERSION 2' / 'quiz_version_2.py',
+    "Version 3": script_dir / 'VERSION 3' / 'quiz_version_3.py'
+}
+
+# Runs inside the child process: stop at the first prompt and print the time
+CHILD_CODE = """
+import builtins, os, runpy, sys, time
+
+def first_prompt(*args, **kwargs):
+    print(time.time(), flush=True)
+    os._exit(0)
+
+builtins.input = first_prompt
+script = sys.argv[1]
+if b'easygui' in open(script, 'rb').read():
+    import easygui
+    for name in ('msgbox', 'enterbox', 'integerbox', 'buttonbox', 'ynbox', 'textbox'):
+        setattr(easygui, name, first_prompt)
+sys.argv = [script]
+sys.path.insert(0, os.path.dirname(script))
+runpy.run_path(script, run_name='__main__')
+"""
+
+def time_to_first_prompt(script):
+    start = time.time()
+    output = subprocess.run([sys.executable, '-c', CHILD_CODE, str(script)], cwd=script.parent,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1]) - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each quiz version until its first prompt.")
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    for label, script in SCRIPTS.items():
+        # The first run warms the disk cache and is not counted
+        time_to_first_prompt(script)
+        times = [time_to_first_prompt(script) for _ in range(args.runs)]
+        print(f"{label}: median {statistics.median(times) * 1000:.0f} ms, "
+              f"min {min(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Combined leaderboard for all versions of the quiz program
+# Finds every quiz_results*.csv in the repository, along with the segments that
+# results_maintenance.py rotated out of it, reads them in parallel (large files
+# are split into chunks so several processes share them), and merges the
+# partial totals into one leaderboard plus a comparison of the versions.
+#
+# Usage: python leaderboard_report.py [--top 10] [--workers 4] [--root .]
+
+# Import necessary modules
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Define the repository directory
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir / 'VERSION 3'))
+from results_maintenance import read_segment, segments_dir
+
+# Files are split into chunks of about this many bytes
+CHUNK_BYTES = 64 * 1024 * 1024
+
+def find_results_files(root):
+    """(path, version) for every results file and every segment rotated out of one."""
+    files = []
+    for path in sorted(root.rglob('quiz_results*.csv')):
+        version = version_of(path)
+        files.append((path, version))
+        folder = segments_dir(path)
+        if folder.exists():
+            files += [(segment, version) for segment in sorted(folder.glob('*.csv')) + sorted(folder.glob('*.seg'))]
+    return files
+
+def version_of(path):
+    # The folder nearest the file decides, after resolving any '..' in the path
+    for part in reversed(path.resolve().parts):
+        match = re.fullmatch(r'VERSION (\d+)', part)
+        if match:
+            return f"Version {match.group(1)}"
+    return path.stem
+
+def plan_chunks(path, version):
+    """Split a results file into (path, version, header, start, end) byte ranges."""
+    if path.suffix == '.seg':
+        # Compacted segments are compressed, so each one is read whole (header None)
+        return [(path, version, None, 0, path.stat().st_size)]
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+    header = next(csv.reader([header_line.decode('utf-8')]), [])
+    start = len(header_line)
+    size = path.stat().st_size
+    chunks = []
+    while start < size:
+        end = min(start + CHUNK_BYTES, size)
+        chunks.append((path, version, header, start, end))
+        start = end
+    return chunks
+
+def read_chunk(chunk):
+    """Map step: totals for the rows that start inside one byte range (or a whole segment)."""
+    path, version, header, start, end = chunk
+    if header is None:
+        scores = ((row[0].strip(), row[2]) for row in read_segment(path))
+    else:
+        scores = read_csv_chunk(path, header, start, end)
+
+    # name key -> [display name, attempts, total percentage, best percentage]
+    participants = {}
+    count = 0
+    total = 0.0
+    for name, percentage in scores:
+        count += 1
+        total += percentage
+        entry = participants.get(name.casefold())
+        if entry is None:
+            participants[name.casefold()] = [name, 1, percentage, percentage]
+        else:
+            entry[1] += 1
+            entry[2] += percentage
+            if percentage > entry[3]:
+                entry[3] = percentage
+    return version, count, total, participants
+
+def read_csv_chunk(path, header, start, end):
+    """(name, percentage) for the CSV rows that start inside a byte range."""
+    name_col = header.index('Name')
+    percentage_col = header.index('Percentage')
+
+    with open(path, 'rb') as f:
+        # A row cut by the chunk start belongs to the previous chunk
+        f.seek(start - 1)
+        f.readline()
+        position = f.tell()
+        data = f.read(max(end - position, 0)) if position < end else b''
+        if data and not data.endswith(b'\n'):
+            # Finish the last row, which continues past the chunk end
+            data += f.readline()
+
+    for row in csv.reader(data.decode('utf-8').splitlines()):
+        if row:
+            yield row[name_col].strip(), float(row[percentage_col])
+
+def merge_participants(into, participants):
+    for key, (name, attempts, total, best) in participants.items():
+        entry = into.get(key)
+        if entry is None:
+            into[key] = [name, attempts, total, best]
+        else:
+            entry[1] += attempts
+            entry[2] += total
+            entry[3] = max(entry[3], best)
+
+def build_report(files, workers=None):
+    """Reduce step: merge every chunk's totals, overall and per version."""
+    chunks = [chunk for path, version in files for chunk in plan_chunks(path, version)]
+    combined = {}
+    versions = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for version, count, total, participants in pool.map(read_chunk, chunks):
+            merge_participants(combined, participants)
+            summary = versions.setdefault(version, {"count": 0, "total": 0.0, "participants": {}})
+            summary["count"] += count
+            summary["total"] += total
+            merge_participants(summary["participants"], participants)
+    return combined, versions
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaderboard across every version's results.")
+    parser.add_argument('--root', type=Path, default=script_dir, help="folder to search for results files")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    files = find_results_files(args.root)
+    if not files:
+        print("No results files found.")
+        return
+
+    start = time.perf_counter()
+    combined, versions = build_report(files, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"Leaderboard ({len(files)} files, {len(combined)} participants)\n")
+    ranked = sorted(combined.values(), key=lambda entry: (entry[3], entry[2] / entry[1]), reverse=True)
+    for place, (name, attempts, total, best) in enumerate(ranked[:args.top], 1):
+        print(f"{place:>3}. {name:<20} best {best:5.1f}%   average {total / attempts:5.1f}%   {attempts} attempts")
+
+    print("\nVersion comparison\n")
+    for version, summary in sorted(versions.items()):
+        average = summary["total"] / summary["count"] if summary["count"] else 0.0
+        best = max((entry[3] for entry in summary["participants"].values()), default=0.0)
+        print(f"  {version:<10} {summary['count']:>10} results   {len(summary['participants']):>8} participants   "
+              f"average {average:5.1f}%   best {best:5.1f}%")
+
+    print(f"\nRead in {elapsed:.2f} seconds with {args.workers} workers.")
+
+if __name__ == "__main__":
+    main()